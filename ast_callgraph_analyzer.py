@@ -5,11 +5,25 @@ This provides full control over the analysis and avoids third-party bugs.
 """
 
 import ast
+import builtins
 import json
+import sys
 import networkx as nx
-from typing import Dict, Set, List, Tuple
+from bisect import bisect_left
+from collections import deque
+from typing import Dict, Set, List, Tuple, Optional
 from pathlib import Path
 
+# Optional faster JSON backend
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+_BUILTIN_NAMES = frozenset(dir(builtins))
+BUILTIN_PREFIX = "<builtin>."
+
 
 class CallGraphAnalyzer(ast.NodeVisitor):
     """AST visitor that builds a call graph"""
@@ -21,6 +35,22 @@ class CallGraphAnalyzer(ast.NodeVisitor):
         self.call_graph = {}
         self.functions = set()
         self.feature_flags = {}
+        self.total_calls = 0  # Running edge count, kept in sync with call_graph
+        self._seen_calls = {}  # function -> set of callees, for O(1) dedup
+        self._builtin_names = _BUILTIN_NAMES  # narrowed per module in visit_Module
+
+    def visit_Module(self, node):
+        """Visit module, noting top-level names that shadow builtins"""
+        shadowed = set()
+        for stmt in node.body:
+            if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                shadowed.add(stmt.name)
+            elif isinstance(stmt, (ast.Import, ast.ImportFrom)):
+                for alias in stmt.names:
+                    shadowed.add((alias.asname or alias.name).split('.')[0])
+        if shadowed:
+            self._builtin_names = _BUILTIN_NAMES - shadowed
+        self.generic_visit(node)
 
     def visit_ClassDef(self, node):
         """Visit class definition"""
@@ -31,31 +61,23 @@ class CallGraphAnalyzer(ast.NodeVisitor):
 
     def visit_FunctionDef(self, node):
         """Visit function definition"""
-        # Build fully qualified function name
+        # Build fully qualified function name (interned: it is reused as a
+        # key and set member throughout the graph analysis)
         if self.current_class:
-            func_name = f"{self.module_name}.{self.current_class}.{node.name}"
+            func_name = sys.intern(f"{self.module_name}.{self.current_class}.{node.name}")
         else:
-            func_name = f"{self.module_name}.{node.name}"
+            func_name = sys.intern(f"{self.module_name}.{node.name}")
 
         self.functions.add(func_name)
 
         # Check for feature flag decorator (supports both @feature_flag and @require_feature)
-        for decorator in node.decorator_list:
-            if isinstance(decorator, ast.Call):
-                decorator_name = None
-                if hasattr(decorator.func, 'id'):
-                    decorator_name = decorator.func.id
-                elif hasattr(decorator.func, 'attr'):
-                    decorator_name = decorator.func.attr
-
-                if decorator_name in ('feature_flag', 'require_feature'):
-                    if decorator.args:
-                        flag_name = ast.literal_eval(decorator.args[0])
-                        self.feature_flags[func_name] = flag_name
+        if node.decorator_list:
+            self._record_feature_flag(func_name, node.decorator_list)
 
         # Initialize call list for this function
         if func_name not in self.call_graph:
             self.call_graph[func_name] = []
+            self._seen_calls[func_name] = set()
 
         # Visit function body
         old_function = self.current_function
@@ -63,6 +85,29 @@ class CallGraphAnalyzer(ast.NodeVisitor):
         self.generic_visit(node)
         self.current_function = old_function
 
+    def _record_feature_flag(self, func_name: str, decorator_list):
+        """Record the flag name from a @feature_flag(...) style decorator"""
+        for decorator in decorator_list:
+            if not isinstance(decorator, ast.Call) or not decorator.args:
+                continue
+
+            func = decorator.func
+            if isinstance(func, ast.Name):
+                decorator_name = func.id
+            elif isinstance(func, ast.Attribute):
+                decorator_name = func.attr
+            else:
+                continue
+
+            if decorator_name in ('feature_flag', 'require_feature'):
+                arg = decorator.args[0]
+                # Plain string literals are read directly; literal_eval is
+                # only needed for anything more elaborate
+                if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+                    self.feature_flags[func_name] = arg.value
+                else:
+                    self.feature_flags[func_name] = ast.literal_eval(arg)
+
     def visit_AsyncFunctionDef(self, node):
         """Visit async function definition (treat same as regular function)"""
         self.visit_FunctionDef(node)
@@ -74,16 +119,24 @@ class CallGraphAnalyzer(ast.NodeVisitor):
             called_func = self._extract_call_name(node)
 
             if called_func:
-                # Add to call graph
-                if called_func not in self.call_graph[self.current_function]:
+                # Add to call graph (the list keeps first-seen order, the
+                # set makes the duplicate check O(1))
+                seen = self._seen_calls[self.current_function]
+                if called_func not in seen:
+                    called_func = sys.intern(called_func)
+                    seen.add(called_func)
                     self.call_graph[self.current_function].append(called_func)
+                    self.total_calls += 1
 
         self.generic_visit(node)
 
     def _extract_call_name(self, node):
         """Extract function name from Call node"""
         if isinstance(node.func, ast.Name):
-            # Simple function call: func()
+            # Simple function call: func() - builtins are tagged so graph
+            # construction can drop them in one pass
+            if node.func.id in self._builtin_names:
+                return f"{BUILTIN_PREFIX}{node.func.id}"
             return f"{self.module_name}.{node.func.id}"
         elif isinstance(node.func, ast.Attribute):
             # Method call or module.func()
@@ -120,7 +173,7 @@ def analyze_file(file_path: str) -> Tuple[Dict, Set, Dict]:
 
 
 def build_networkx_graph(call_graph: Dict) -> nx.DiGraph:
-    """Build a NetworkX directed graph from call graph"""
+    """Build a NetworkX directed graph from call graph (builtin calls are left out)"""
     G = nx.DiGraph()
 
     # Add all nodes
@@ -130,39 +183,364 @@ def build_networkx_graph(call_graph: Dict) -> nx.DiGraph:
     # Add edges (calls)
     for caller, callees in call_graph.items():
         for callee in callees:
-            G.add_edge(caller, callee)
+            if not callee.startswith(BUILTIN_PREFIX):
+                G.add_edge(caller, callee)
 
     return G
 
 
-def get_downstream_dependencies(graph: nx.DiGraph, function: str) -> Set[str]:
+def _reachable(adjacency, start: str) -> Set[str]:
+    """
+    Collect every node reachable from start (excluding start itself).
+
+    Iterative DFS with an explicit stack, so deep call chains cannot hit the
+    recursion limit and no per-edge function calls are made.
+    """
+    visited = set()
+    stack = [start]
+
+    while stack:
+        for neighbor in adjacency[stack.pop()]:
+            if neighbor not in visited:
+                visited.add(neighbor)
+                stack.append(neighbor)
+
+    visited.discard(start)
+    return visited
+
+
+class ReachabilityIndex:
+    """
+    Precomputed transitive reachability for a call graph.
+
+    Cycles are collapsed into strongly connected components (iterative
+    Tarjan) and the reach set of every component is computed once over the
+    resulting DAG, so downstream/upstream queries become set lookups instead
+    of a graph walk per query. The graph must not change after indexing.
+
+    Reach sets are bitsets stored as Python ints (bit i = SCC id i), so
+    propagation is a word-parallel OR done in C and memory is K*K/8 bytes.
+    """
+
+    def __init__(self, graph: nx.DiGraph):
+        self.node_to_scc: Dict[str, int] = {}
+        self.scc_members: List[List[str]] = []
+        self.scc_reach: List[int] = []       # bitset of SCC ids reachable from each SCC
+        self.scc_reach_from: List[int] = []  # bitset of SCC ids that can reach each SCC
+
+        # Expanded function-name sets per SCC id, filled on first query.
+        # Every member of an SCC shares the same entry.
+        self._descendants_cache: Dict[int, frozenset] = {}
+        self._ancestors_cache: Dict[int, frozenset] = {}
+        # Sorted versions of the above, keyed by (is_descendants, scc_id)
+        self._sorted_cache: Dict[Tuple[bool, int], Tuple[str, ...]] = {}
+
+        # Work on dense integer ids internally: adjacency becomes lists of
+        # ints and per-node state lives in flat lists / a bytearray instead
+        # of string-keyed dicts and sets
+        names = list(graph.succ)
+        node_id = {name: i for i, name in enumerate(names)}
+        succ = [[node_id[callee] for callee in graph.succ[name]] for name in names]
+
+        scc_of, member_ids = self._build_scc_dag(succ)
+        self._build_reverse_reach(succ, scc_of, member_ids)
+
+        # Convert back to names at the API boundary
+        self.node_to_scc = dict(zip(names, scc_of))
+        self.scc_members = [[names[i] for i in members] for members in member_ids]
+
+    def _build_scc_dag(self, succ: List[List[int]]) -> Tuple[List[int], List[List[int]]]:
+        """Tarjan's algorithm; SCCs complete in reverse topological order"""
+        scc_reach = self.scc_reach
+        n = len(succ)
+
+        scc_of = [-1] * n
+        member_ids = []
+        order = [-1] * n
+        lowlink = [0] * n
+        on_stack = bytearray(n)
+        stack = []
+        counter = 0
+
+        for root in range(n):
+            if order[root] != -1:
+                continue
+
+            order[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            work = [(root, iter(succ[root]))]
+
+            while work:
+                node, neighbors = work[-1]
+                for neighbor in neighbors:
+                    if order[neighbor] == -1:
+                        order[neighbor] = lowlink[neighbor] = counter
+                        counter += 1
+                        stack.append(neighbor)
+                        on_stack[neighbor] = 1
+                        work.append((neighbor, iter(succ[neighbor])))
+                        break
+                    if on_stack[neighbor] and order[neighbor] < lowlink[node]:
+                        lowlink[node] = order[neighbor]
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        if lowlink[node] < lowlink[parent]:
+                            lowlink[parent] = lowlink[node]
+
+                    if lowlink[node] == order[node]:
+                        # node is the root of a completed SCC
+                        scc_id = len(member_ids)
+                        members = []
+                        while True:
+                            member = stack.pop()
+                            on_stack[member] = 0
+                            scc_of[member] = scc_id
+                            members.append(member)
+                            if member == node:
+                                break
+                        member_ids.append(members)
+
+                        # Successor SCCs are already complete, so their
+                        # reach sets can simply be OR-ed in
+                        reach = 1 << scc_id
+                        for member in members:
+                            for callee in succ[member]:
+                                succ_id = scc_of[callee]
+                                if succ_id != scc_id:
+                                    reach |= scc_reach[succ_id]
+                        scc_reach.append(reach)
+
+        return scc_of, member_ids
+
+    def _build_reverse_reach(self, succ: List[List[int]], scc_of: List[int],
+                             member_ids: List[List[int]]) -> None:
+        """
+        Propagate ancestor sets in topological order (highest SCC id first).
+
+        Each SCC pushes its finished set along its outgoing edges, so no
+        separate predecessor adjacency has to be built.
+        """
+        reach_from = [1 << scc_id for scc_id in range(len(member_ids))]
+
+        for scc_id in range(len(member_ids) - 1, -1, -1):
+            reach = reach_from[scc_id]
+            for member in member_ids[scc_id]:
+                for callee in succ[member]:
+                    succ_id = scc_of[callee]
+                    if succ_id != scc_id:
+                        reach_from[succ_id] |= reach
+
+        self.scc_reach_from = reach_from
+
+    def _expand(self, scc_id: int, reach: List[int],
+                cache: Dict[int, frozenset]) -> frozenset:
+        """Expand an SCC's reach bitset back into function names (memoized)"""
+        expanded = cache.get(scc_id)
+        if expanded is None:
+            members = self.scc_members
+            # bin() lists the bits most significant first; reverse and drop '0b'
+            bits = bin(reach[scc_id])[:1:-1]
+            expanded = frozenset().union(
+                *(members[other] for other, bit in enumerate(bits) if bit == '1')
+            )
+            cache[scc_id] = expanded
+        return expanded
+
+    def descendants(self, function: str) -> Set[str]:
+        """All functions reachable from function"""
+        scc_id = self.node_to_scc.get(function)
+        if scc_id is None:
+            return set()
+        result = set(self._expand(scc_id, self.scc_reach, self._descendants_cache))
+        result.discard(function)
+        return result
+
+    def _sorted_reach(self, function: str, downstream: bool) -> List[str]:
+        """Sorted descendants/ancestors, sorting each SCC's reach set only once"""
+        scc_id = self.node_to_scc.get(function)
+        if scc_id is None:
+            return []
+
+        key = (downstream, scc_id)
+        ordered = self._sorted_cache.get(key)
+        if ordered is None:
+            if downstream:
+                expanded = self._expand(scc_id, self.scc_reach, self._descendants_cache)
+            else:
+                expanded = self._expand(scc_id, self.scc_reach_from, self._ancestors_cache)
+            ordered = self._sorted_cache[key] = tuple(sorted(expanded))
+
+        # The expansion always contains function itself (its own SCC)
+        i = bisect_left(ordered, function)
+        return list(ordered[:i] + ordered[i + 1:])
+
+    def sorted_descendants(self, function: str) -> List[str]:
+        """descendants(function) as a sorted list"""
+        return self._sorted_reach(function, True)
+
+    def sorted_ancestors(self, function: str) -> List[str]:
+        """ancestors(function) as a sorted list"""
+        return self._sorted_reach(function, False)
+
+    def has_path(self, source: str, target: str) -> bool:
+        """Whether target is in descendants(source), without expanding it"""
+        source_scc = self.node_to_scc.get(source)
+        target_scc = self.node_to_scc.get(target)
+        if source_scc is None or target_scc is None or source == target:
+            return False
+        return (self.scc_reach[source_scc] >> target_scc) & 1 == 1
+
+    def ancestors(self, function: str) -> Set[str]:
+        """All functions that can reach function"""
+        scc_id = self.node_to_scc.get(function)
+        if scc_id is None:
+            return set()
+        result = set(self._expand(scc_id, self.scc_reach_from, self._ancestors_cache))
+        result.discard(function)
+        return result
+
+
+def get_downstream_dependencies(graph: nx.DiGraph, function: str,
+                                reachability: Optional[ReachabilityIndex] = None) -> Set[str]:
     """
     Get all functions called by the given function (transitive closure).
-    Uses DFS to find all reachable nodes.
+    Uses DFS to find all reachable nodes, or the precomputed reachability
+    index when one is given.
     """
     if function not in graph:
         return set()
 
+    if reachability is not None:
+        return reachability.descendants(function)
+
     # Get all descendants (functions called directly or indirectly)
-    descendants = nx.descendants(graph, function)
-    return descendants
+    return _reachable(graph.succ, function)
 
 
-def get_upstream_dependencies(graph: nx.DiGraph, function: str) -> Set[str]:
+def get_upstream_dependencies(graph: nx.DiGraph, function: str,
+                              reachability: Optional[ReachabilityIndex] = None) -> Set[str]:
     """
     Get all functions that call the given function (transitive closure).
-    Uses reverse DFS to find all nodes that can reach this function.
+    Uses reverse DFS to find all nodes that can reach this function, or the
+    precomputed reachability index when one is given.
     """
     if function not in graph:
         return set()
 
+    if reachability is not None:
+        return reachability.ancestors(function)
+
     # Get all ancestors (functions that call this directly or indirectly)
-    ancestors = nx.ancestors(graph, function)
-    return ancestors
+    return _reachable(graph.pred, function)
+
+
+def find_call_path(graph: nx.DiGraph, source: str, target: str,
+                   reachability: Optional[ReachabilityIndex] = None) -> List[str]:
+    """
+    Find one shortest call chain from source to target.
+
+    Single BFS with parent pointers, so the cost is O(V+E) rather than
+    enumerating every path. Returns an empty list when target is unreachable.
+    """
+    if source not in graph or target not in graph or source == target:
+        return []
+
+    if reachability is not None and not reachability.has_path(source, target):
+        return []
+
+    parent = {source: None}
+    queue = deque([source])
+
+    while queue:
+        node = queue.popleft()
+        for neighbor in graph.succ[node]:
+            if neighbor in parent:
+                continue
+            parent[neighbor] = node
+            if neighbor == target:
+                path = [target]
+                while parent[path[-1]] is not None:
+                    path.append(parent[path[-1]])
+                path.reverse()
+                return path
+            queue.append(neighbor)
+
+    return []
+
+
+def find_all_call_paths(graph: nx.DiGraph, source: str, target: str,
+                        reachability: Optional[ReachabilityIndex] = None,
+                        max_paths: Optional[int] = None) -> List[List[str]]:
+    """
+    Enumerate every simple call chain from source to target.
+
+    Iterative DFS over (path, iterator) stacks: a single on-path set is
+    updated on push and undone on backtrack, so no visited set is copied per
+    edge. With a reachability index, branches that cannot reach target are
+    pruned. The number of paths can be exponential; max_paths caps it.
+    """
+    if source not in graph or target not in graph or source == target:
+        return []
+
+    if reachability is not None and not reachability.has_path(source, target):
+        return []
+
+    succ = graph.succ
+    paths = []
+    path = [source]
+    on_path = {source}
+    stack = [iter(succ[source])]
+
+    while stack:
+        for neighbor in stack[-1]:
+            if neighbor == target:
+                paths.append(path + [target])
+                if max_paths is not None and len(paths) >= max_paths:
+                    return paths
+            elif neighbor not in on_path and (
+                reachability is None or reachability.has_path(neighbor, target)
+            ):
+                path.append(neighbor)
+                on_path.add(neighbor)
+                stack.append(iter(succ[neighbor]))
+                break
+        else:
+            # Children exhausted: backtrack
+            stack.pop()
+            on_path.discard(path.pop())
+
+    return paths
 
 
-def get_direct_callers(call_graph: Dict, function: str) -> Set[str]:
-    """Get functions that directly call the given function"""
+def build_reverse_call_graph(call_graph: Dict) -> Dict[str, Set[str]]:
+    """Build a callee -> callers map in a single pass over the call graph"""
+    reverse_graph = {}
+    for caller, callees in call_graph.items():
+        for callee in callees:
+            if callee.startswith(BUILTIN_PREFIX):
+                continue
+            callers = reverse_graph.get(callee)
+            if callers is None:
+                callers = reverse_graph[callee] = set()
+            callers.add(caller)
+    return reverse_graph
+
+
+def get_direct_callers(call_graph: Dict, function: str,
+                       reverse_graph: Optional[Dict[str, Set[str]]] = None) -> Set[str]:
+    """
+    Get functions that directly call the given function.
+
+    Pass a prebuilt reverse_graph (see build_reverse_call_graph) when making
+    repeated queries to turn each lookup into a dict access.
+    """
+    if reverse_graph is not None:
+        return set(reverse_graph.get(function, ()))
+
     callers = set()
     for caller, callees in call_graph.items():
         if function in callees:
@@ -170,51 +548,108 @@ def get_direct_callers(call_graph: Dict, function: str) -> Set[str]:
     return callers
 
 
-def analyze_feature_impact(call_graph: Dict, feature_flags: Dict, flag_name: str) -> Dict:
+def build_flag_index(feature_flags: Dict) -> Dict[str, List[str]]:
+    """Invert function -> flag into flag -> functions in a single pass"""
+    flag_index = {}
+    for func, flag in feature_flags.items():
+        funcs = flag_index.get(flag)
+        if funcs is None:
+            funcs = flag_index[flag] = []
+        funcs.append(func)
+    return flag_index
+
+
+def build_graph_json(call_graph: Dict, file_path: Optional[str] = None) -> Dict[str, List[Dict]]:
+    """
+    Flatten a call graph into {"nodes": [...], "edges": [...]} keyed by short names.
+
+    Nodes are the defined functions and edges their non-builtin calls. Both
+    are collected in one pass over the adjacency lists; dict.fromkeys keeps
+    first-seen order while dropping duplicates (e.g. methods sharing a short
+    name), so the cost is O(N + E).
+    """
+    nodes = {}
+    edges = {}
+    file_name = file_path or "unknown"
+
+    # Each qualified name is shortened once, however many edges mention it
+    short_names = {}
+
+    def short_name(name: str) -> str:
+        short = short_names.get(name)
+        if short is None:
+            short = short_names[name] = name.rpartition(".")[2]
+        return short
+
+    for caller, callees in call_graph.items():
+        source = short_name(caller)
+        nodes.setdefault(source, {"id": source, "name": caller, "file": file_name})
+        edges.update(dict.fromkeys(
+            (source, short_name(callee))
+            for callee in callees if not callee.startswith(BUILTIN_PREFIX)
+        ))
+
+    return {
+        "nodes": list(nodes.values()),
+        "edges": [{"source": source, "target": target} for source, target in edges]
+    }
+
+
+def analyze_feature_impact(call_graph: Dict, feature_flags: Dict, flag_name: str,
+                           graph: Optional[nx.DiGraph] = None,
+                           reverse_graph: Optional[Dict[str, Set[str]]] = None,
+                           reachability: Optional[ReachabilityIndex] = None,
+                           flag_index: Optional[Dict[str, List[str]]] = None) -> Dict:
     """
     Analyze the impact of disabling a feature flag.
 
+    graph, reverse_graph, reachability and flag_index can be passed in when
+    analyzing several flags against the same call graph so they are only
+    built once.
+
     Returns detailed impact report.
     """
+    if flag_index is None:
+        flag_index = build_flag_index(feature_flags)
+
     # Find functions with this feature flag
-    flagged_functions = [
-        func for func, flag in feature_flags.items()
-        if flag == flag_name
-    ]
+    flagged_functions = flag_index.get(flag_name, [])
 
     if not flagged_functions:
         return {
             "error": f"No functions found with feature flag: {flag_name}",
-            "available_flags": list(set(feature_flags.values()))
+            "available_flags": list(flag_index)
         }
 
-    # Build NetworkX graph for analysis
-    graph = build_networkx_graph(call_graph)
+    # Build NetworkX graph and reverse index for analysis
+    if graph is None:
+        graph = build_networkx_graph(call_graph)
+    if reverse_graph is None:
+        reverse_graph = build_reverse_call_graph(call_graph)
 
     results = {}
 
     for func in flagged_functions:
         # Get downstream dependencies (functions that become unreachable)
-        downstream = get_downstream_dependencies(graph, func)
+        downstream = get_downstream_dependencies(graph, func, reachability)
 
         # Get upstream dependencies (functions that call this)
-        upstream = get_upstream_dependencies(graph, func)
+        upstream = get_upstream_dependencies(graph, func, reachability)
 
         # Get direct callers (immediate upstream)
-        direct_callers = get_direct_callers(call_graph, func)
+        direct_callers = get_direct_callers(call_graph, func, reverse_graph)
 
         # Find functions needing fallback (non-flagged direct callers)
-        needs_fallback = set()
-        for caller in direct_callers:
-            if caller not in feature_flags:
-                needs_fallback.add(caller)
+        needs_fallback = direct_callers - feature_flags.keys()
 
         results[func] = {
             "feature_flag": flag_name,
-            "downstream_dependencies": sorted(list(downstream)),
-            "upstream_dependencies": sorted(list(upstream)),
-            "direct_callers": sorted(list(direct_callers)),
-            "requires_fallback_in": sorted(list(needs_fallback)),
+            "downstream_dependencies": (reachability.sorted_descendants(func)
+                                        if reachability else sorted(downstream)),
+            "upstream_dependencies": (reachability.sorted_ancestors(func)
+                                      if reachability else sorted(upstream)),
+            "direct_callers": sorted(direct_callers),
+            "requires_fallback_in": sorted(needs_fallback),
             "impact_summary": {
                 "total_affected_functions": len(downstream) + len(upstream),
                 "functions_that_become_unreachable": len(downstream),
@@ -227,10 +662,58 @@ def analyze_feature_impact(call_graph: Dict, feature_flags: Dict, flag_name: str
     return results
 
 
+def load_json(file_path: str):
+    """Load a JSON file, using orjson when it is installed"""
+    if orjson is not None:
+        with open(file_path, 'rb') as f:
+            return orjson.loads(f.read())
+
+    with open(file_path, 'r') as f:
+        return json.load(f)
+
+
+def dumps_json(data, indent: bool = True, sort_keys: bool = False) -> bytes:
+    """Serialize data to UTF-8 JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        option = 0
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(data, option=option)
+
+    return json.dumps(data, indent=2 if indent else None, sort_keys=sort_keys).encode()
+
+
+def dump_json(data, file_path: str, indent: bool = True, sort_keys: bool = False):
+    """Write data as JSON, using orjson when it is installed"""
+    with open(file_path, 'wb') as f:
+        f.write(dumps_json(data, indent, sort_keys))
+
+
+def stream_json_object(items, out, sort_keys: bool = False) -> None:
+    """
+    Write (key, value) pairs to a binary file as one indented JSON object.
+
+    Each value is serialized and written as soon as it is produced, so the
+    full object never has to be held in memory or encoded in one go.
+    """
+    out.write(b"{")
+    empty = True
+    for key, value in items:
+        out.write(b"\n  " if empty else b",\n  ")
+        out.write(dumps_json(key))
+        out.write(b": ")
+        # Re-indent the nested value one level; raw newlines cannot occur
+        # inside JSON strings, so this only touches layout
+        out.write(dumps_json(value, sort_keys=sort_keys).replace(b"\n", b"\n  "))
+        empty = False
+    out.write(b"}" if empty else b"\n}")
+
+
 def export_to_json(call_graph: Dict, output_file: str):
     """Export call graph to JSON format"""
-    with open(output_file, 'w') as f:
-        json.dump(call_graph, f, indent=2)
+    dump_json(call_graph, output_file)
 
 
 def export_to_graphviz(graph: nx.DiGraph, feature_flags: Dict, output_file: str):
@@ -301,8 +784,6 @@ def print_analysis_report(analysis_results: Dict):
 
 
 if __name__ == "__main__":
-    import sys
-
     # Analyze sample_app.py
     source_file = "sample_app.py"
 
@@ -336,14 +817,21 @@ if __name__ == "__main__":
         print(f"  • {flag}: {func}")
     print()
 
-    all_results = {}
-    for flag_name in set(feature_flags.values()):
-        results = analyze_feature_impact(call_graph, feature_flags, flag_name)
-        all_results[flag_name] = results
-        print_analysis_report(results)
-
-    # Save detailed results
-    with open("feature_impact_analysis.json", "w") as f:
-        json.dump(all_results, f, indent=2)
+    reverse_graph = build_reverse_call_graph(call_graph)
+    reachability = ReachabilityIndex(graph)
+    flag_index = build_flag_index(feature_flags)
+
+    def analyze_all_flags():
+        for flag_name in sorted(flag_index):
+            results = analyze_feature_impact(
+                call_graph, feature_flags, flag_name, graph, reverse_graph,
+                reachability, flag_index
+            )
+            print_analysis_report(results)
+            yield flag_name, results
+
+    # Save detailed results, writing each flag's report as it is produced
+    with open("feature_impact_analysis.json", "wb") as f:
+        stream_json_object(analyze_all_flags(), f, sort_keys=True)
 
     print("\n✅ Detailed analysis saved to: feature_impact_analysis.json")
@@ -5,7 +5,10 @@ Tracks all changes to feature flags, clients, rulesets, and other entities.
 Provides queryable audit trail for compliance and debugging.
 """
 
+import atexit
 import json
+import queue
+import threading
 from datetime import datetime, timezone, timedelta
 from typing import Dict, Any, Optional, List
 from flask import request, g
@@ -69,6 +72,14 @@ class AuditLogger:
         self._buffer: List[Dict[str, Any]] = []
         self._buffer_size = 10  # Flush after this many entries
         self._fallback_logs: List[Dict[str, Any]] = []  # In-memory fallback
+        self._buffer_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        # Full buffers are handed to a background writer so requests never
+        # wait on the audit_logs insert; it also writes a partly filled
+        # buffer once it is this many seconds old
+        self._pending: "queue.Queue[List[Dict[str, Any]]]" = queue.Queue(maxsize=1000)
+        self._writer: Optional[threading.Thread] = None
+        self._flush_interval = 1.0
 
     def _get_request_info(self) -> Dict[str, Any]:
         """Extract request information for audit log."""
@@ -163,11 +174,20 @@ class AuditLogger:
             "user_agent": request_info.get("user_agent")
         }
 
-        self._buffer.append(log_entry)
+        with self._buffer_lock:
+            self._buffer.append(log_entry)
+            entries = None
+            if len(self._buffer) >= self._buffer_size:
+                entries, self._buffer = self._buffer, []
 
-        # Flush if buffer is full
-        if len(self._buffer) >= self._buffer_size:
-            self.flush()
+        self._ensure_writer()
+        if entries is not None:
+            # Buffer is full: write it in the background
+            try:
+                self._pending.put_nowait(entries)
+            except queue.Full:
+                # The writer is far behind; write here rather than drop entries
+                self._write(entries)
 
     def _sanitize_for_json(self, data: Any) -> Any:
         """Sanitize data for JSON storage."""
@@ -189,26 +209,71 @@ class AuditLogger:
         return str(data)
 
     def flush(self):
-        """Flush buffered logs to database."""
-        if not self._buffer:
+        """Flush buffered and queued logs to database."""
+        with self._buffer_lock:
+            entries, self._buffer = self._buffer, []
+        entries = self._take_pending() + entries
+        if entries:
+            self._write(entries)
+
+    def _ensure_writer(self):
+        """Start the background writer thread if it isn't running."""
+        if self._writer is not None and self._writer.is_alive():
             return
-
-        entries = self._buffer.copy()
-        self._buffer = []
-
-        if self.supabase:
+        with self._buffer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                if self._writer is None:
+                    # The writer is a daemon thread; write what's left at exit
+                    atexit.register(self.flush)
+                self._writer = threading.Thread(
+                    target=self._writer_loop, name="audit-writer", daemon=True
+                )
+                self._writer.start()
+
+    def _writer_loop(self):
+        """Write queued batches, coalescing whatever has piled up into one
+        insert; when nothing arrives for a flush interval, write the
+        partly filled buffer instead."""
+        while True:
             try:
-                self.supabase.client.table("audit_logs").insert(entries).execute()
+                entries = self._pending.get(timeout=self._flush_interval)
+            except queue.Empty:
+                with self._buffer_lock:
+                    entries, self._buffer = self._buffer, []
+                if not entries:
+                    continue
+            else:
+                entries.extend(self._take_pending())
+            try:
+                self._write(entries)
             except Exception as e:
-                logger.error(f"Error flushing audit logs: {e}")
-                # Store in fallback
+                logger.error(f"Error writing audit logs: {e}")
+
+    def _take_pending(self) -> List[Dict[str, Any]]:
+        """Drain every batch currently queued for the writer."""
+        entries: List[Dict[str, Any]] = []
+        while True:
+            try:
+                entries.extend(self._pending.get_nowait())
+            except queue.Empty:
+                return entries
+
+    def _write(self, entries: List[Dict[str, Any]]):
+        """Insert entries into the database, falling back to memory on failure."""
+        with self._write_lock:
+            if self.supabase:
+                try:
+                    self.supabase.client.table("audit_logs").insert(entries).execute()
+                except Exception as e:
+                    logger.error(f"Error flushing audit logs: {e}")
+                    # Store in fallback
+                    self._fallback_logs.extend(entries)
+                    # Retry fallback logs if we have too many
+                    if len(self._fallback_logs) > 100:
+                        self._retry_fallback_logs()
+            else:
+                # No Supabase - store in memory
                 self._fallback_logs.extend(entries)
-                # Retry fallback logs if we have too many
-                if len(self._fallback_logs) > 100:
-                    self._retry_fallback_logs()
-        else:
-            # No Supabase - store in memory
-            self._fallback_logs.extend(entries)
 
     def _retry_fallback_logs(self):
         """Retry sending fallback logs to database."""
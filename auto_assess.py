@@ -8,9 +8,18 @@ import sys
 from typing import Dict, List, Tuple
 from collections import defaultdict
 
+# Optional faster JSON backend; analysis files for real projects are large
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 def load_analysis(filepath: str) -> Dict:
     """Load analysis JSON file."""
+    if orjson is not None:
+        with open(filepath, 'rb') as f:
+            return orjson.loads(f.read())
     with open(filepath, 'r') as f:
         return json.load(f)
 
@@ -260,6 +269,10 @@ if __name__ == "__main__":
 
     # Save report
     output_file = filepath.replace('.json', '_assessment.json')
-    with open(output_file, 'w') as f:
-        json.dump(report, f, indent=2)
+    if orjson is not None:
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+    else:
+        with open(output_file, 'w') as f:
+            json.dump(report, f, indent=2)
     print(f"\nDetailed report saved to: {output_file}")
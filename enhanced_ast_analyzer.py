@@ -4,20 +4,101 @@ Detects shared helpers that are used by multiple features vs feature-specific he
 """
 
 import ast
-import json
+import hashlib
+import os
+import stat
+import tempfile
 import networkx as nx
+from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Dict, Set, List, Tuple, Optional
 from pathlib import Path
 from collections import defaultdict
 
 from ast_callgraph_analyzer import (
     CallGraphAnalyzer,
-    analyze_file,
+    ReachabilityIndex,
+    build_flag_index,
+    dump_json,
+    load_json,
     build_networkx_graph,
+    build_reverse_call_graph,
+    get_direct_callers,
     get_downstream_dependencies,
     get_upstream_dependencies
 )
 
+# Bump whenever the analysis output changes so stale cache entries are ignored
+_ANALYZER_VERSION = "2"
+
+# On-disk analysis cache (defaults to the temp dir, which is writable on Vercel).
+# The temp dir is shared, so the default is per user and must be private
+_UID = os.getuid() if hasattr(os, "getuid") else None
+_CACHE_DIR = Path(os.environ.get(
+    "AST_ANALYSIS_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), f"ast_analysis_cache-{_UID if _UID is not None else 'user'}")
+))
+# Oldest entries beyond this many are deleted after each write
+_CACHE_MAX_FILES = 256
+
+
+def _private_cache_dir() -> Optional[Path]:
+    """
+    Create the cache dir if needed and check that only we can write to it.
+
+    Returns None (no disk cache) if it is not a directory we own with
+    0o700 permissions, so nobody else can plant analysis results in it.
+    """
+    try:
+        _CACHE_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+        st = os.lstat(_CACHE_DIR)
+    except OSError:
+        return None
+    if _UID is None:
+        return _CACHE_DIR
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != _UID:
+        return None
+    if st.st_mode & 0o077:
+        try:
+            os.chmod(_CACHE_DIR, 0o700)
+        except OSError:
+            return None
+    return _CACHE_DIR
+
+
+def _prune_cache_dir(cache_dir: Path) -> None:
+    """Delete the oldest cache entries beyond _CACHE_MAX_FILES."""
+    try:
+        entries = [entry for entry in os.scandir(cache_dir) if entry.name.endswith(".json")]
+        if len(entries) <= _CACHE_MAX_FILES:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime_ns)
+        for entry in entries[:len(entries) - _CACHE_MAX_FILES]:
+            os.unlink(entry.path)
+    except OSError:
+        pass
+
+
+@dataclass(slots=True)
+class HelperInfo:
+    """Helper function metadata (slotted to keep large helper tables compact)"""
+
+    used_by_features: Set[str] = field(default_factory=set)
+    is_leaf: bool = False
+
+    @property
+    def is_shared(self) -> bool:
+        """True when the helper is used by more than one feature"""
+        return len(self.used_by_features) > 1
+
+    def to_dict(self) -> dict:
+        """Convert to a JSON-serializable dict"""
+        return {
+            "used_by_features": sorted(self.used_by_features),
+            "is_shared": self.is_shared,
+            "is_leaf": self.is_leaf
+        }
+
 
 class EnhancedCallGraphAnalyzer(CallGraphAnalyzer):
     """Extended analyzer with helper detection and complexity metrics"""
@@ -62,13 +143,15 @@ class EnhancedCallGraphAnalyzer(CallGraphAnalyzer):
 
 
 def detect_helper_functions(call_graph: Dict, feature_flags: Dict,
-                            graph: nx.DiGraph) -> Tuple[Dict[str, dict], Set[str]]:
+                            graph: nx.DiGraph,
+                            reachability: Optional[ReachabilityIndex] = None
+                            ) -> Tuple[Dict[str, HelperInfo], Set[str]]:
     """
     Detect helper functions and classify them as feature-specific or shared.
 
     Returns:
         Tuple of (helper_info, shared_helpers)
-        - helper_info: Dict mapping function names to helper metadata
+        - helper_info: Dict mapping function names to HelperInfo metadata
         - shared_helpers: Set of functions used by multiple features
     """
     helper_info = {}
@@ -80,54 +163,51 @@ def detect_helper_functions(call_graph: Dict, feature_flags: Dict,
             continue
 
         # Get all downstream functions (helpers used by this feature)
-        downstream = get_downstream_dependencies(graph, flagged_func)
+        downstream = get_downstream_dependencies(graph, flagged_func, reachability)
 
         for helper_func in downstream:
             # Skip if it's also a feature-flagged function
             if helper_func not in feature_flags:
                 feature_to_helpers[flag_name].add(helper_func)
 
-                if helper_func not in helper_info:
-                    helper_info[helper_func] = {
-                        "used_by_features": set(),
-                        "is_shared": False,
-                        "is_leaf": len(call_graph.get(helper_func, [])) == 0
-                    }
+                info = helper_info.get(helper_func)
+                if info is None:
+                    info = helper_info[helper_func] = HelperInfo(
+                        is_leaf=len(call_graph.get(helper_func, [])) == 0
+                    )
 
-                helper_info[helper_func]["used_by_features"].add(flag_name)
+                info.used_by_features.add(flag_name)
 
     # Identify shared helpers (used by multiple features)
-    shared_helpers = set()
-    for helper_func, info in helper_info.items():
-        if len(info["used_by_features"]) > 1:
-            info["is_shared"] = True
-            shared_helpers.add(helper_func)
-
-    # Convert sets to lists for JSON serialization
-    for helper_func in helper_info:
-        helper_info[helper_func]["used_by_features"] = list(
-            helper_info[helper_func]["used_by_features"]
-        )
+    shared_helpers = {
+        helper_func for helper_func, info in helper_info.items() if info.is_shared
+    }
 
     return helper_info, shared_helpers
 
 
 def calculate_feature_disable_impact(call_graph: Dict, feature_flags: Dict,
                                      graph: nx.DiGraph, flag_name: str,
-                                     helper_info: Dict[str, dict]) -> Dict:
+                                     helper_info: Dict[str, HelperInfo],
+                                     reverse_graph: Optional[Dict[str, Set[str]]] = None,
+                                     reachability: Optional[ReachabilityIndex] = None,
+                                     flag_index: Optional[Dict[str, List[str]]] = None) -> Dict:
     """
     Calculate what happens when a feature is disabled, considering shared helpers.
 
+    Pass a prebuilt reverse_graph, reachability index and flag_index when
+    analyzing several features so lookups replace repeated scans.
+
     Returns detailed impact including:
     - Functions that can be safely disabled (feature-specific)
     - Functions that must remain (shared helpers)
     - Fallback requirements
     """
+    if flag_index is None:
+        flag_index = build_flag_index(feature_flags)
+
     # Find functions with this feature flag
-    flagged_functions = [
-        func for func, flag in feature_flags.items()
-        if flag == flag_name
-    ]
+    flagged_functions = flag_index.get(flag_name, [])
 
     if not flagged_functions:
         return {"error": f"No functions found with feature flag: {flag_name}"}
@@ -139,47 +219,36 @@ def calculate_feature_disable_impact(call_graph: Dict, feature_flags: Dict,
             continue
 
         # Get downstream dependencies
-        downstream = get_downstream_dependencies(graph, func)
-
-        # Classify downstream functions
-        can_disable = set()  # Feature-specific, can be disabled
-        must_keep = set()    # Shared helpers, must keep active
-
-        for dep_func in downstream:
-            if dep_func in helper_info:
-                if helper_info[dep_func]["is_shared"]:
-                    must_keep.add(dep_func)
-                else:
-                    can_disable.add(dep_func)
-            else:
-                # Not a helper, probably can disable if it's feature-specific
-                can_disable.add(dep_func)
+        downstream = get_downstream_dependencies(graph, func, reachability)
+
+        # Classify downstream functions: shared helpers must stay active,
+        # everything else is feature-specific and can be disabled
+        must_keep = {
+            dep_func for dep_func in downstream
+            if dep_func in helper_info and helper_info[dep_func].is_shared
+        }
+        can_disable = downstream - must_keep
 
         # Get upstream dependencies (who calls this feature)
-        upstream = get_upstream_dependencies(graph, func)
+        upstream = get_upstream_dependencies(graph, func, reachability)
 
         # Find direct callers needing fallback
-        direct_callers = set()
-        for caller, callees in call_graph.items():
-            if func in callees:
-                direct_callers.add(caller)
+        direct_callers = get_direct_callers(call_graph, func, reverse_graph)
 
-        needs_fallback = set()
-        for caller in direct_callers:
-            if caller not in feature_flags:
-                needs_fallback.add(caller)
+        needs_fallback = direct_callers - feature_flags.keys()
 
         results[func] = {
             "feature_flag": flag_name,
-            "can_safely_disable": sorted(list(can_disable)),
-            "must_keep_active": sorted(list(must_keep)),
+            "can_safely_disable": sorted(can_disable),
+            "must_keep_active": sorted(must_keep),
             "must_keep_reasons": {
-                fn: f"Shared by features: {', '.join(helper_info[fn]['used_by_features'])}"
+                fn: f"Shared by features: {', '.join(sorted(helper_info[fn].used_by_features))}"
                 for fn in must_keep if fn in helper_info
             },
-            "upstream_dependencies": sorted(list(upstream)),
-            "direct_callers": sorted(list(direct_callers)),
-            "requires_fallback_in": sorted(list(needs_fallback)),
+            "upstream_dependencies": (reachability.sorted_ancestors(func)
+                                      if reachability else sorted(upstream)),
+            "direct_callers": sorted(direct_callers),
+            "requires_fallback_in": sorted(needs_fallback),
             "impact_summary": {
                 "total_downstream": len(downstream),
                 "can_disable_count": len(can_disable),
@@ -191,10 +260,14 @@ def calculate_feature_disable_impact(call_graph: Dict, feature_flags: Dict,
     return results
 
 
-def analyze_codebase_with_helpers(file_path: str) -> Dict:
+def analyze_codebase_with_helpers(file_path: str, use_cache: bool = True) -> Dict:
     """
     Comprehensive analysis including helper detection.
 
+    Results are cached in-process by (path, mtime, size) and on disk by a hash
+    of the source, so repeat runs on unchanged files skip the analysis. The
+    returned dict may be shared between callers and must not be mutated.
+
     Returns complete analysis with:
     - Call graph
     - Function list
@@ -203,13 +276,53 @@ def analyze_codebase_with_helpers(file_path: str) -> Dict:
     - Shared helper detection
     - Feature disable impact
     """
-    # Basic analysis
-    call_graph, functions, feature_flags = analyze_file(file_path)
+    if not use_cache:
+        return _analyze_codebase_with_helpers(file_path)
 
-    # Build graph
-    graph = build_networkx_graph(call_graph)
+    file_stat = os.stat(file_path)
+    return _analyze_cached(file_path, file_stat.st_mtime_ns, file_stat.st_size)
+
+
+@lru_cache(maxsize=32)
+def _analyze_cached(file_path: str, mtime_ns: int, size: int) -> Dict:
+    """In-process cache layer; falls through to the on-disk cache"""
+    with open(file_path, 'rb') as f:
+        source_bytes = f.read()
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(_ANALYZER_VERSION.encode())
+    digest.update(os.path.abspath(file_path).encode())
+    digest.update(source_bytes)
+
+    cache_dir = _private_cache_dir()
+    if cache_dir is None:
+        return _analyze_codebase_with_helpers(file_path)
+    cache_file = cache_dir / f"{digest.hexdigest()}.json"
+
+    try:
+        return load_json(cache_file)
+    except (OSError, ValueError):
+        pass
 
-    # Analyze with enhanced analyzer for complexity metrics
+    analysis = _analyze_codebase_with_helpers(file_path)
+
+    try:
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        dump_json(analysis, tmp_file, indent=False)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        # Cache is best-effort (e.g. read-only filesystem)
+        pass
+    else:
+        _prune_cache_dir(cache_dir)
+
+    return analysis
+
+
+def _analyze_codebase_with_helpers(file_path: str) -> Dict:
+    """Run the full (uncached) analysis"""
+    # Single pass: the enhanced analyzer builds the basic call graph as well
+    # as the complexity metrics
     with open(file_path, 'r') as f:
         source = f.read()
     tree = ast.parse(source, filename=file_path)
@@ -217,14 +330,27 @@ def analyze_codebase_with_helpers(file_path: str) -> Dict:
     enhanced_analyzer = EnhancedCallGraphAnalyzer(module_name)
     enhanced_analyzer.visit(tree)
 
+    call_graph = enhanced_analyzer.call_graph
+    functions = enhanced_analyzer.functions
+    feature_flags = enhanced_analyzer.feature_flags
+
+    # Build graph and the reachability index shared by all queries below
+    graph = build_networkx_graph(call_graph)
+    reachability = ReachabilityIndex(graph)
+
     # Detect helpers
-    helper_info, shared_helpers = detect_helper_functions(call_graph, feature_flags, graph)
+    helper_info, shared_helpers = detect_helper_functions(
+        call_graph, feature_flags, graph, reachability
+    )
 
     # Calculate impact for each feature
+    reverse_graph = build_reverse_call_graph(call_graph)
+    flag_index = build_flag_index(feature_flags)
     feature_impact = {}
-    for flag_name in set(feature_flags.values()):
+    for flag_name in flag_index:
         impact = calculate_feature_disable_impact(
-            call_graph, feature_flags, graph, flag_name, helper_info
+            call_graph, feature_flags, graph, flag_name, helper_info,
+            reverse_graph, reachability, flag_index
         )
         feature_impact[flag_name] = impact
 
@@ -233,18 +359,20 @@ def analyze_codebase_with_helpers(file_path: str) -> Dict:
         "call_graph": call_graph,
         "functions": list(functions),
         "feature_flags": feature_flags,
-        "helper_functions": helper_info,
+        "helper_functions": {
+            helper_func: info.to_dict() for helper_func, info in helper_info.items()
+        },
         "shared_helpers": list(shared_helpers),
         "function_complexity": enhanced_analyzer.function_complexity,
         "function_lines": enhanced_analyzer.function_lines,
         "feature_impact": feature_impact,
         "statistics": {
             "total_functions": len(functions),
-            "total_calls": sum(len(v) for v in call_graph.values()),
+            "total_calls": enhanced_analyzer.total_calls,
             "feature_flagged_functions": len(feature_flags),
             "helper_functions": len(helper_info),
             "shared_helpers": len(shared_helpers),
-            "features": len(set(feature_flags.values()))
+            "features": len(flag_index)
         }
     }
 
@@ -283,8 +411,8 @@ def get_functions_for_feature(analysis: Dict, feature_name: str) -> Dict[str, Li
 
     return {
         "entry_points": entry_points,
-        "can_disable": sorted(list(can_disable)),
-        "must_keep": sorted(list(must_keep))
+        "can_disable": sorted(can_disable),
+        "must_keep": sorted(must_keep)
     }
 
 
@@ -334,7 +462,6 @@ if __name__ == "__main__":
 
     # Save detailed results
     output_file = "enhanced_analysis.json"
-    with open(output_file, "w") as f:
-        json.dump(analysis, f, indent=2)
+    dump_json(analysis, output_file)
 
     print(f"\n✅ Detailed analysis saved to: {output_file}")
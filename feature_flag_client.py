@@ -5,30 +5,104 @@ Provides API for checking feature access for clients based on their assigned rul
 Enhanced with targeting rules, scheduling, and audit logging support.
 """
 
+import atexit
+import copy
+import importlib.util
 import json
 import os
+import tempfile
+import threading
+import time
 import yaml
-from typing import Dict, Any, Optional, Set
+from typing import Dict, Any, List, Optional, Set, Tuple
 
 from ruleset_engine import RulesetEngine
 
-# Optional imports for enhanced features
+# Optional faster JSON backend
 try:
-    from targeting import get_targeting_engine
+    import orjson
 except ImportError:
-    get_targeting_engine = None
+    orjson = None
 
-try:
-    from scheduling import get_schedule_engine
-except ImportError:
-    get_schedule_engine = None
+# Marks a lazily created engine that has not been resolved yet
+_UNSET = object()
 
-try:
-    from audit import get_audit_logger, AuditAction, EntityType
-except ImportError:
-    get_audit_logger = None
-    AuditAction = None
-    EntityType = None
+# Polling waits until config files have been untouched this long before
+# reloading, so multi-step writes are picked up once, complete
+_POLL_SETTLE_SECONDS = 1.0
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer environment variable, falling back to default if unset or invalid."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        print(f"Warning: Invalid {name}={value!r}, using {default}")
+        return default
+
+
+# isEnabled result cache settings shared by the app and the nixo routes,
+# tunable per deployment
+EVAL_CACHE_TTL = (
+    _env_int('EVAL_CACHE_TTL_MS', 3000) / 1000
+    if os.environ.get('EVAL_CACHE_ENABLED', '1') != '0' else 0
+)
+EVAL_CACHE_MAX_ITEMS = _env_int('EVAL_CACHE_MAX_ITEMS', 50_000)
+
+# Use the libyaml-backed loader/dumper when PyYAML was built with them
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_YamlDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+
+def load_yaml(f) -> Any:
+    """Safe-load YAML from an open file, with libyaml when available."""
+    return yaml.load(f, Loader=_YamlLoader)
+
+
+def save_yaml(data: Any, path: str) -> bool:
+    """
+    Atomically write data to a YAML file, skipping the write if unchanged.
+
+    The document is rendered once, compared against the current file and
+    swapped in with os.replace, so pollers never see a half-written file.
+
+    Returns:
+        True if the file was (re)written
+    """
+    content = yaml.dump(
+        data, Dumper=_YamlDumper, default_flow_style=False, sort_keys=False
+    ).encode()
+    mode = None
+    try:
+        with open(path, "rb") as f:
+            if f.read() == content:
+                return False
+            mode = os.fstat(f.fileno()).st_mode & 0o7777
+    except OSError:
+        pass
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        if mode is not None:
+            # mkstemp creates 0600 files; keep the original permissions
+            os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return True
+
+
+def _load_json(f) -> Any:
+    """Load JSON from an open file, with orjson when available."""
+    if orjson is not None:
+        return orjson.loads(f.read())
+    return json.load(f)
 
 
 class FeatureFlagClient:
@@ -45,7 +119,10 @@ class FeatureFlagClient:
         supabase_client=None,
         enable_targeting: bool = True,
         enable_scheduling: bool = True,
-        enable_audit: bool = True
+        enable_audit: bool = True,
+        eval_cache_ttl: float = 3.0,
+        eval_cache_max: int = 50_000,
+        rulesets_dir: Optional[str] = None
     ):
         """
         Initialize the Feature Flag Client.
@@ -59,78 +136,272 @@ class FeatureFlagClient:
             enable_targeting: Enable targeting rules engine
             enable_scheduling: Enable scheduling engine
             enable_audit: Enable audit logging
+            eval_cache_ttl: Seconds an isEnabled result may be reused (0 disables)
+            eval_cache_max: Maximum number of cached isEnabled results
+            rulesets_dir: Optional directory of per-ruleset YAML fragments,
+                loaded after config_path (see add_ruleset)
         """
         self.config_path = config_path
+        self.rulesets_dir = rulesets_dir
         self.clients_path = clients_path
         self.bootstrap_path = bootstrap_path
         self.supabase = supabase_client
 
+        # Parsed config files keyed by path -> ((mtime_ns, size), data)
+        self._config_cache: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+
+        # Short-lived isEnabled results: (client, feature, context) -> (expiry, result)
+        self._eval_cache: Dict[tuple, Tuple[float, bool]] = {}
+        self._eval_cache_ttl = eval_cache_ttl
+        self._eval_cache_max = eval_cache_max
+        self._config_version = 0
+
         # Initialize engine
         self.engine = RulesetEngine(baseline_ruleset_name=baseline_ruleset)
 
-        # Initialize enhanced features
-        self._targeting_engine = None
-        self._schedule_engine = None
-        self._audit_logger = None
+        # Enhanced features are created on first use (see the properties below)
+        self._enable_targeting = enable_targeting
+        self._enable_scheduling = enable_scheduling
+        self._enable_audit = enable_audit
+        self._targeting_engine = _UNSET
+        self._schedule_engine = _UNSET
+        self._audit_logger = _UNSET
+        self._AuditAction = None
+        self._EntityType = None
+        # Held while an optional engine is built, so each is built once
+        self._engines_lock = threading.Lock()
+
+        # asyncio task refreshing configuration, see start_polling_async
+        self._poll_task = None
+        # (mtime_ns, size) per config file as of the last load
+        self._loaded_signature: Optional[tuple] = None
+        # clients.yaml contents waiting for a delayed save, see save_clients_config
+        self._pending_clients: Optional[Dict[str, Any]] = None
+        self._clients_save_timer: Optional[threading.Timer] = None
+        self._clients_save_lock = threading.Lock()
+        self._clients_flush_at_exit = False
 
-        if enable_targeting and get_targeting_engine:
-            self._targeting_engine = get_targeting_engine(supabase_client)
-            self.engine.set_targeting_engine(self._targeting_engine)
+        # Load configuration
+        self._load_configuration()
 
-        if enable_scheduling and get_schedule_engine:
-            self._schedule_engine = get_schedule_engine(supabase_client)
-            self.engine.set_schedule_engine(self._schedule_engine)
+    # The optional modules are imported here rather than at module level so
+    # plain isEnabled callers never pay for loading them
+
+    @property
+    def targeting_engine(self):
+        """Targeting rules engine, created and attached on first access."""
+        if self._targeting_engine is _UNSET:
+            # Attached before it is published, so no evaluation sees it half set up
+            with self._engines_lock:
+                if self._targeting_engine is _UNSET:
+                    targeting_engine = None
+                    if self._enable_targeting:
+                        try:
+                            from targeting import get_targeting_engine
+                        except ImportError:
+                            pass
+                        else:
+                            targeting_engine = get_targeting_engine(self.supabase)
+                            self.engine.set_targeting_engine(targeting_engine)
+                    self._targeting_engine = targeting_engine
+        return self._targeting_engine
+
+    @property
+    def schedule_engine(self):
+        """Scheduling engine, created and attached on first access."""
+        if self._schedule_engine is _UNSET:
+            with self._engines_lock:
+                if self._schedule_engine is _UNSET:
+                    schedule_engine = None
+                    if self._enable_scheduling:
+                        try:
+                            from scheduling import get_schedule_engine
+                        except ImportError:
+                            pass
+                        else:
+                            schedule_engine = get_schedule_engine(self.supabase)
+                            self.engine.set_schedule_engine(schedule_engine)
+                    self._schedule_engine = schedule_engine
+        return self._schedule_engine
+
+    @property
+    def audit_logger(self):
+        """Audit logger, created and attached on first access."""
+        if self._audit_logger is _UNSET:
+            with self._engines_lock:
+                if self._audit_logger is _UNSET:
+                    audit_logger = None
+                    if self._enable_audit:
+                        try:
+                            from audit import get_audit_logger, AuditAction, EntityType
+                        except ImportError:
+                            pass
+                        else:
+                            self._AuditAction = AuditAction
+                            self._EntityType = EntityType
+                            audit_logger = get_audit_logger(self.supabase)
+                            self.engine.set_audit_logger(audit_logger)
+                    self._audit_logger = audit_logger
+        return self._audit_logger
+
+    # Status checks that don't build the engines
+
+    @staticmethod
+    def _engine_available(current, enabled: bool, module: str) -> bool:
+        if current is not _UNSET:
+            return current is not None
+        return enabled and importlib.util.find_spec(module) is not None
+
+    def targeting_available(self) -> bool:
+        """Whether targeting is (or will be, on first use) attached."""
+        return self._engine_available(self._targeting_engine, self._enable_targeting, "targeting")
+
+    def scheduling_available(self) -> bool:
+        """Whether scheduling is (or will be, on first use) attached."""
+        return self._engine_available(self._schedule_engine, self._enable_scheduling, "scheduling")
+
+    def _prepare_evaluation(self, user_context: Optional[Dict[str, Any]]) -> None:
+        """Attach the engines an evaluation consults before it runs."""
+        # Schedules are checked on every evaluation, targeting only with a user context
+        if self._schedule_engine is _UNSET:
+            self.schedule_engine
+        if user_context and self._targeting_engine is _UNSET:
+            self.targeting_engine
+
+    def _load_file_cached(self, path: str, parser) -> Any:
+        """
+        Parse a configuration file, skipping the parse if it is unchanged.
 
-        if enable_audit and get_audit_logger:
-            self._audit_logger = get_audit_logger(supabase_client)
-            self.engine.set_audit_logger(self._audit_logger)
+        Args:
+            path: File to load
+            parser: Callable taking the open file and returning its data
 
-        # Load configuration
-        self._load_configuration()
+        Returns:
+            A private copy of the parsed data (the engine keeps references
+            into it, so the cached original is never handed out)
+        """
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+
+        cached = self._config_cache.get(path)
+        if cached is None or cached[0] != key:
+            with open(path, 'r') as f:
+                cached = (key, parser(f))
+            self._config_cache[path] = cached
+
+        return copy.deepcopy(cached[1])
+
+    def _fragment_paths(self) -> list:
+        """Ruleset fragment files in rulesets_dir, in load order."""
+        if not self.rulesets_dir:
+            return []
+        try:
+            names = os.listdir(self.rulesets_dir)
+        except OSError:
+            return []
+        return [
+            os.path.join(self.rulesets_dir, name)
+            for name in sorted(names) if name.endswith(".yaml")
+        ]
+
+    def _config_signature(self) -> tuple:
+        """(mtime_ns, size) of each configuration file, None if missing."""
+        signature = []
+        fragments = self._fragment_paths()
+        for path in (self.config_path, self.bootstrap_path, self.clients_path, *fragments):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _config_changed(self, settle_seconds: float = 0.0) -> bool:
+        """
+        Check whether any configuration file changed since the last load.
+
+        Args:
+            settle_seconds: Report no change yet while the newest file
+                modification is more recent than this
+
+        Returns:
+            True if a reload is due
+        """
+        signature = self._config_signature()
+        if signature == self._loaded_signature:
+            return False
+
+        if settle_seconds > 0:
+            newest = max((entry[0] for entry in signature if entry), default=0)
+            if time.time_ns() - newest < settle_seconds * 1e9:
+                return False
+
+        return True
 
     def _load_configuration(self) -> None:
         """Load rulesets and clients from configuration files."""
+        # Taken before reading so a write racing this load triggers another
+        self._loaded_signature = self._config_signature()
+        fragments = self._fragment_paths()
         config_loaded = False
 
         # Try loading rulesets from YAML
         if os.path.exists(self.config_path):
             try:
-                with open(self.config_path, 'r') as f:
-                    rulesets = yaml.safe_load(f)
-                    if rulesets:
-                        self.engine.load_multiple_rulesets(rulesets)
-                        config_loaded = True
+                rulesets = self._load_file_cached(self.config_path, load_yaml)
+                if rulesets:
+                    self.engine.load_multiple_rulesets(rulesets)
+                    config_loaded = True
             except Exception as e:
                 print(f"Warning: Failed to load rulesets from YAML: {e}")
 
         # Fall back to bootstrap if needed
         if not config_loaded and os.path.exists(self.bootstrap_path):
             try:
-                with open(self.bootstrap_path, 'r') as f:
-                    rulesets = json.load(f)
-                    self.engine.load_multiple_rulesets(rulesets)
-                    config_loaded = True
+                rulesets = self._load_file_cached(self.bootstrap_path, _load_json)
+                self.engine.load_multiple_rulesets(rulesets)
+                config_loaded = True
             except Exception as e:
                 print(f"Warning: Failed to load bootstrap defaults: {e}")
 
         if not config_loaded:
             raise RuntimeError("Failed to load ruleset configuration")
 
+        for path in fragments:
+            self._load_fragment(path)
+
         # Load clients
         if os.path.exists(self.clients_path):
             try:
-                with open(self.clients_path, 'r') as f:
-                    clients_config = yaml.safe_load(f)
-                    if clients_config:
-                        for client_id, client_data in clients_config.items():
-                            self.engine.register_client(
-                                client_id,
-                                client_data.get("ruleset"),
-                                client_data.get("metadata", {})
-                            )
+                clients_config = self._load_file_cached(self.clients_path, load_yaml)
+                if clients_config:
+                    for client_id, client_data in clients_config.items():
+                        self.engine.register_client(
+                            client_id,
+                            client_data.get("ruleset"),
+                            client_data.get("metadata", {})
+                        )
             except Exception as e:
                 print(f"Warning: Failed to load clients: {e}")
 
+        # Only once clients are registered too, so nothing cached in between
+        # can outlive this load
+        self._invalidate_eval_cache()
+
+    def _load_fragment(self, path: str) -> None:
+        """
+        Merge one ruleset fragment file into the engine.
+
+        Args:
+            path: YAML file mapping ruleset names to their configurations
+        """
+        try:
+            rulesets = self._load_file_cached(path, load_yaml)
+            if rulesets:
+                self.engine.load_multiple_rulesets(rulesets)
+        except Exception as e:
+            print(f"Warning: Failed to load ruleset fragment {path}: {e}")
+
     def isEnabled(
         self,
         client_id: str,
@@ -157,7 +428,121 @@ class FeatureFlagClient:
                 # Show baseline analytics
                 pass
         """
-        return self.engine.is_feature_enabled(client_id, feature_name, user_context)
+        if self.engine._use_baseline:
+            # Kill switch: answer from the memoized baseline lookup without
+            # hashing the context or touching the result cache
+            return self.engine._check_baseline_feature(feature_name)
+
+        # Read the cache reference once: invalidation swaps in a new dict,
+        # so a result computed against an older config lands in the
+        # discarded one instead of outliving the reload
+        return self._evaluate_cached(
+            self._eval_cache, client_id, feature_name, user_context,
+            self._eval_context_key(user_context)
+        )
+
+    def isEnabledBatch(
+        self,
+        client_id: str,
+        feature_names: List[str],
+        user_context: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, bool]:
+        """
+        Check several features for a client in one call.
+
+        Args:
+            client_id: Client identifier
+            feature_names: Features to check
+            user_context: Optional user context shared by all checks
+
+        Returns:
+            Dictionary mapping each feature name to its isEnabled result
+        """
+        if self.engine._use_baseline:
+            # Kill switch: every answer is a (memoized) baseline lookup
+            check_baseline = self.engine._check_baseline_feature
+            return {name: check_baseline(name) for name in feature_names}
+
+        # The context part of the cache key is hashed once for the batch
+        cache = self._eval_cache
+        context_key = self._eval_context_key(user_context)
+        return {
+            name: self._evaluate_cached(cache, client_id, name, user_context, context_key)
+            for name in feature_names
+        }
+
+    def _evaluate_cached(
+        self,
+        cache: Dict[tuple, Tuple[float, bool]],
+        client_id: str,
+        feature_name: str,
+        user_context: Optional[Dict[str, Any]],
+        context_key: Any
+    ) -> bool:
+        """
+        Evaluate a feature through the isEnabled result cache.
+
+        Args:
+            cache: Result cache to read and fill (the caller's snapshot)
+            client_id: Client identifier
+            feature_name: Feature to check
+            user_context: Optional user context
+            context_key: Result of _eval_context_key(user_context)
+
+        Returns:
+            True if feature is enabled, False otherwise
+        """
+        key = None
+        if context_key is not _UNSET:
+            key = (client_id, feature_name, context_key)
+            entry = cache.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+
+        self._prepare_evaluation(user_context)
+        result = self.engine.is_feature_enabled(client_id, feature_name, user_context)
+
+        if key is not None:
+            if len(cache) >= self._eval_cache_max:
+                # Evict the oldest entry (dicts keep insertion order)
+                try:
+                    cache.pop(next(iter(cache), None), None)
+                except RuntimeError:
+                    # Another thread resized the dict mid-lookup; skip eviction
+                    pass
+            cache[key] = (time.monotonic() + self._eval_cache_ttl, result)
+
+        return result
+
+    def _eval_context_key(self, user_context: Optional[Dict[str, Any]]) -> Any:
+        """
+        Build the user-context part of the isEnabled result-cache key.
+
+        Returns:
+            The hashable context key, or _UNSET if caching is disabled or
+            the context has unhashable values
+        """
+        if self._eval_cache_ttl <= 0:
+            return _UNSET
+        if not user_context:
+            # The engine treats None and {} alike
+            return None
+        try:
+            return frozenset(user_context.items())
+        except TypeError:
+            return _UNSET
+
+    def _invalidate_eval_cache(self) -> None:
+        """Drop cached isEnabled results after any configuration change."""
+        # Swap rather than clear() so in-flight evaluations keep writing to
+        # the old dict (read-copy-update; no lock on the evaluation path)
+        self._eval_cache = {}
+        self._config_version += 1
+
+    @property
+    def config_version(self) -> int:
+        """Counter bumped on every configuration change (for derived caches)."""
+        return self._config_version
 
     def get_client_features(self, client_id: str) -> Set[str]:
         """
@@ -171,6 +556,15 @@ class FeatureFlagClient:
         """
         return self.engine.get_client_features(client_id)
 
+    def get_all_client_features(self) -> Dict[str, Set[str]]:
+        """
+        Get features for every registered client in one pass.
+
+        Returns:
+            Dictionary mapping client IDs to sets of feature names
+        """
+        return self.engine.get_all_client_features()
+
     def register_client(
         self,
         client_id: str,
@@ -186,6 +580,7 @@ class FeatureFlagClient:
             metadata: Optional metadata (name, tier, etc.)
         """
         self.engine.register_client(client_id, ruleset_name, metadata)
+        self._invalidate_eval_cache()
 
     def update_client_ruleset(self, client_id: str, new_ruleset: str) -> bool:
         """
@@ -198,15 +593,27 @@ class FeatureFlagClient:
         Returns:
             True if successful
         """
-        return self.engine.client_manager.update_client_ruleset(client_id, new_ruleset)
+        updated = self.engine.client_manager.update_client_ruleset(client_id, new_ruleset)
+        self._invalidate_eval_cache()
+        return updated
 
     def activate_kill_switch(self) -> None:
         """Activate global kill switch - all clients use baseline."""
         self.engine.activate_kill_switch()
+        self._invalidate_eval_cache()
 
     def deactivate_kill_switch(self) -> None:
         """Deactivate kill switch - resume normal operation."""
         self.engine.deactivate_kill_switch()
+        self._invalidate_eval_cache()
+
+    def has_client(self, client_id: str) -> bool:
+        """Check whether a client is registered."""
+        return self.engine.get_client(client_id) is not None
+
+    def get_client_info(self, client_id: str) -> Optional[Dict[str, Any]]:
+        """Get one registered client's data, or None if unknown."""
+        return self.engine.get_client(client_id)
 
     def get_all_clients(self) -> Dict[str, Dict[str, Any]]:
         """Get all registered clients."""
@@ -216,10 +623,192 @@ class FeatureFlagClient:
         """Get all rulesets."""
         return self.engine.get_all_rulesets()
 
+    def get_counts(self) -> Tuple[int, int]:
+        """
+        Count registered clients and loaded rulesets.
+
+        Unlike len(get_all_rulesets()), nothing is copied or resolved.
+
+        Returns:
+            Tuple of (client count, ruleset count)
+        """
+        return len(self.engine.client_manager.clients), len(self.engine.rulesets)
+
+    def add_ruleset(self, name: str, config: Dict[str, Any]) -> str:
+        """
+        Persist a ruleset as its own fragment in rulesets_dir and load it.
+
+        Only the new fragment is written and parsed; the rest of the
+        configuration is left alone.
+
+        Fragments load after config_path, so an existing ruleset is never
+        replaced this way.
+
+        Args:
+            name: Ruleset name (also the fragment's file name)
+            config: Ruleset configuration
+
+        Returns:
+            Path of the fragment file
+
+        Raises:
+            ValueError: If rulesets_dir is not set or the ruleset exists
+        """
+        if not self.rulesets_dir:
+            raise ValueError("rulesets_dir is not configured")
+        if name in self.engine.rulesets:
+            raise ValueError(f"Ruleset '{name}' already exists")
+
+        os.makedirs(self.rulesets_dir, exist_ok=True)
+        path = os.path.join(self.rulesets_dir, f"{name}.yaml")
+        save_yaml({name: config}, path)
+        self._load_fragment(path)
+        self._invalidate_eval_cache()
+        return path
+
+    def get_clients_config(self) -> Dict[str, Any]:
+        """
+        Get the contents of the clients file.
+
+        Includes a delayed save that hasn't been written yet; otherwise
+        served from the parsed-file cache, so the YAML is only parsed again
+        if the file changed since it was last read.
+
+        Returns:
+            A private copy of the clients configuration
+        """
+        with self._clients_save_lock:
+            if self._pending_clients is not None:
+                return copy.deepcopy(self._pending_clients)
+        return self._load_file_cached(self.clients_path, load_yaml) or {}
+
+    def save_clients_config(self, clients: Dict[str, Any], delay: float = 0.0) -> None:
+        """
+        Write the clients file.
+
+        Registering clients is left to the caller (register_client); this
+        only persists them and keeps the parse cache in step. With a delay,
+        saves made until it expires are coalesced into one write of the
+        latest contents; a failed delayed write stays pending and is
+        retried after the same delay, and anything still pending is
+        written at exit.
+
+        Args:
+            clients: Full clients configuration to persist
+            delay: Seconds to wait before writing; 0 writes immediately
+        """
+        with self._clients_save_lock:
+            self._pending_clients = copy.deepcopy(clients)
+            if delay > 0:
+                if self._clients_save_timer is None:
+                    if not self._clients_flush_at_exit:
+                        atexit.register(self.flush_clients_config)
+                        self._clients_flush_at_exit = True
+                    self._schedule_clients_flush(delay)
+                return
+        self.flush_clients_config()
+
+    def _schedule_clients_flush(self, delay: float) -> None:
+        """Start the timer for a delayed clients write (lock held)."""
+        timer = threading.Timer(delay, self._flush_clients_config_delayed, args=(delay,))
+        timer.daemon = True
+        self._clients_save_timer = timer
+        timer.start()
+
+    def _flush_clients_config_delayed(self, delay: float) -> None:
+        """Timer callback: nobody is waiting on it, so retry instead of raising."""
+        try:
+            self.flush_clients_config()
+        except Exception as e:
+            print(f"Warning: Failed to save clients, retrying in {delay}s: {e}")
+            with self._clients_save_lock:
+                if self._pending_clients is not None and self._clients_save_timer is None:
+                    self._schedule_clients_flush(delay)
+
+    def flush_clients_config(self) -> None:
+        """
+        Write a pending save_clients_config now, if there is one.
+
+        If the write fails the save stays pending and the error is raised.
+        """
+        with self._clients_save_lock:
+            timer, self._clients_save_timer = self._clients_save_timer, None
+            if timer is not None:
+                timer.cancel()
+            clients = self._pending_clients
+            if clients is None:
+                return
+
+            # Cleared only once written; saves wait on the lock, so nothing
+            # newer can have replaced it in the meantime
+            save_yaml(clients, self.clients_path)
+            self._pending_clients = None
+
+            # clients is already a private copy, so it can seed the cache as is
+            stat = os.stat(self.clients_path)
+            self._config_cache[self.clients_path] = (
+                (stat.st_mtime_ns, stat.st_size), clients
+            )
+
     def reload_configuration(self) -> None:
         """Reload configuration from files."""
         self._load_configuration()
 
+    def reload_if_changed(self) -> bool:
+        """
+        Reload configuration only if a configuration file changed.
+
+        Returns:
+            True if the configuration was reloaded
+        """
+        if not self._config_changed():
+            return False
+        self._load_configuration()
+        return True
+
+    # Background refresh
+
+    def start_polling_async(self, interval: float = 30.0):
+        """
+        Periodically reload configuration from the running asyncio loop.
+
+        Runs as a task on the caller's event loop instead of a dedicated
+        thread. Each tick is a stat() of the config files; only when one
+        changed (and has settled) is the reload handed to asyncio.to_thread.
+        Must be called from within a running loop.
+
+        Args:
+            interval: Seconds between reloads
+
+        Returns:
+            The polling asyncio.Task
+        """
+        import asyncio
+
+        self.stop_polling()
+        self._poll_task = asyncio.get_running_loop().create_task(
+            self._poll_updates_async(interval)
+        )
+        return self._poll_task
+
+    async def _poll_updates_async(self, interval: float) -> None:
+        """Reload configuration every interval seconds until cancelled."""
+        import asyncio
+
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if self._config_changed(_POLL_SETTLE_SECONDS):
+                    await asyncio.to_thread(self.reload_configuration)
+            except Exception as e:
+                print(f"Warning: Failed to reload configuration: {e}")
+
+    def stop_polling(self) -> None:
+        """Cancel the polling task started by start_polling_async, if any."""
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            self._poll_task = None
+
     # Enhanced evaluation methods
 
     def isEnabledDetailed(
@@ -239,18 +828,20 @@ class FeatureFlagClient:
         Returns:
             Dict with 'enabled', 'reason', 'source', and debug info
         """
+        self._prepare_evaluation(user_context)
         return self.engine.is_feature_enabled_detailed(client_id, feature_name, user_context)
 
     # Targeting methods
 
     def add_targeting_rule(self, rule_config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Add a new targeting rule."""
-        if self._targeting_engine:
-            result = self._targeting_engine.add_rule(rule_config)
-            if result and self._audit_logger:
-                self._audit_logger.log(
-                    AuditAction.TARGETING_RULE_CREATE,
-                    EntityType.TARGETING_RULE,
+        if self.targeting_engine:
+            result = self.targeting_engine.add_rule(rule_config)
+            self._invalidate_eval_cache()
+            if result and self.audit_logger:
+                self.audit_logger.log(
+                    self._AuditAction.TARGETING_RULE_CREATE,
+                    self._EntityType.TARGETING_RULE,
                     result.get("id"),
                     rule_config.get("name"),
                     after=rule_config
@@ -260,12 +851,13 @@ class FeatureFlagClient:
 
     def update_targeting_rule(self, rule_id: str, updates: Dict[str, Any]) -> bool:
         """Update an existing targeting rule."""
-        if self._targeting_engine:
-            success = self._targeting_engine.update_rule(rule_id, updates)
-            if success and self._audit_logger:
-                self._audit_logger.log(
-                    AuditAction.TARGETING_RULE_UPDATE,
-                    EntityType.TARGETING_RULE,
+        if self.targeting_engine:
+            success = self.targeting_engine.update_rule(rule_id, updates)
+            self._invalidate_eval_cache()
+            if success and self.audit_logger:
+                self.audit_logger.log(
+                    self._AuditAction.TARGETING_RULE_UPDATE,
+                    self._EntityType.TARGETING_RULE,
                     rule_id,
                     after=updates
                 )
@@ -274,26 +866,29 @@ class FeatureFlagClient:
 
     def delete_targeting_rule(self, rule_id: str) -> bool:
         """Delete a targeting rule."""
-        if self._targeting_engine:
-            return self._targeting_engine.delete_rule(rule_id)
+        if self.targeting_engine:
+            deleted = self.targeting_engine.delete_rule(rule_id)
+            self._invalidate_eval_cache()
+            return deleted
         return False
 
     def list_targeting_rules(self, feature_name: Optional[str] = None) -> list:
         """List targeting rules."""
-        if self._targeting_engine:
-            return self._targeting_engine.list_rules(feature_name)
+        if self.targeting_engine:
+            return self.targeting_engine.list_rules(feature_name)
         return []
 
     # Scheduling methods
 
     def add_schedule(self, schedule_config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Add a new feature schedule."""
-        if self._schedule_engine:
-            result = self._schedule_engine.add_schedule(schedule_config)
-            if result and self._audit_logger:
-                self._audit_logger.log(
-                    AuditAction.SCHEDULE_CREATE,
-                    EntityType.SCHEDULE,
+        if self.schedule_engine:
+            result = self.schedule_engine.add_schedule(schedule_config)
+            self._invalidate_eval_cache()
+            if result and self.audit_logger:
+                self.audit_logger.log(
+                    self._AuditAction.SCHEDULE_CREATE,
+                    self._EntityType.SCHEDULE,
                     result.get("id"),
                     schedule_config.get("feature_name"),
                     after=schedule_config
@@ -303,12 +898,13 @@ class FeatureFlagClient:
 
     def update_schedule(self, schedule_id: str, updates: Dict[str, Any]) -> bool:
         """Update an existing schedule."""
-        if self._schedule_engine:
-            success = self._schedule_engine.update_schedule(schedule_id, updates)
-            if success and self._audit_logger:
-                self._audit_logger.log(
-                    AuditAction.SCHEDULE_UPDATE,
-                    EntityType.SCHEDULE,
+        if self.schedule_engine:
+            success = self.schedule_engine.update_schedule(schedule_id, updates)
+            self._invalidate_eval_cache()
+            if success and self.audit_logger:
+                self.audit_logger.log(
+                    self._AuditAction.SCHEDULE_UPDATE,
+                    self._EntityType.SCHEDULE,
                     schedule_id,
                     after=updates
                 )
@@ -317,20 +913,22 @@ class FeatureFlagClient:
 
     def delete_schedule(self, schedule_id: str) -> bool:
         """Delete a schedule."""
-        if self._schedule_engine:
-            return self._schedule_engine.delete_schedule(schedule_id)
+        if self.schedule_engine:
+            deleted = self.schedule_engine.delete_schedule(schedule_id)
+            self._invalidate_eval_cache()
+            return deleted
         return False
 
     def list_schedules(self, feature_name: Optional[str] = None) -> list:
         """List schedules."""
-        if self._schedule_engine:
-            return self._schedule_engine.list_schedules(feature_name)
+        if self.schedule_engine:
+            return self.schedule_engine.list_schedules(feature_name)
         return []
 
     def get_upcoming_schedules(self, hours: int = 24) -> list:
         """Get schedules starting within the next N hours."""
-        if self._schedule_engine:
-            return self._schedule_engine.get_upcoming_schedules(hours)
+        if self.schedule_engine:
+            return self.schedule_engine.get_upcoming_schedules(hours)
         return []
 
     # Audit methods
@@ -342,8 +940,8 @@ class FeatureFlagClient:
         limit: int = 100
     ) -> list:
         """Query audit logs."""
-        if self._audit_logger:
-            return self._audit_logger.query(
+        if self.audit_logger:
+            return self.audit_logger.query(
                 entity_type=entity_type,
                 entity_id=entity_id,
                 limit=limit
@@ -352,9 +950,9 @@ class FeatureFlagClient:
 
     def get_feature_history(self, feature_name: str, limit: int = 50) -> list:
         """Get audit history for a specific feature."""
-        if self._audit_logger:
-            return self._audit_logger.get_entity_history(
-                EntityType.FEATURE if EntityType else "feature",
+        if self.audit_logger:
+            return self.audit_logger.get_entity_history(
+                self._EntityType.FEATURE,
                 feature_name,
                 limit
             )
@@ -362,18 +960,19 @@ class FeatureFlagClient:
 
     def get_recent_activity(self, hours: int = 24) -> list:
         """Get recent activity."""
-        if self._audit_logger:
-            return self._audit_logger.get_recent_activity(hours)
+        if self.audit_logger:
+            return self.audit_logger.get_recent_activity(hours)
         return []
 
     def flush_audit_logs(self):
         """Flush any buffered audit logs."""
-        if self._audit_logger:
-            self._audit_logger.flush()
+        if self.audit_logger:
+            self.audit_logger.flush()
 
 
 # Global singleton instance
 _default_client: Optional[FeatureFlagClient] = None
+_default_client_lock = threading.Lock()
 
 
 def get_client(**kwargs) -> FeatureFlagClient:
@@ -387,9 +986,14 @@ def get_client(**kwargs) -> FeatureFlagClient:
         The default FeatureFlagClient instance
     """
     global _default_client
-    if _default_client is None:
-        _default_client = FeatureFlagClient(**kwargs)
-    return _default_client
+    client = _default_client
+    if client is None:
+        # Concurrent first callers build a single client between them
+        with _default_client_lock:
+            client = _default_client
+            if client is None:
+                client = _default_client = FeatureFlagClient(**kwargs)
+    return client
 
 
 def isEnabled(
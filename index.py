@@ -4,10 +4,14 @@ Includes: Feature flags, AST analysis, Ruleset management, Supabase integration
 Enhanced: API authentication, Targeting rules, Scheduling, Audit logging
 Nixo: Feature management system with flexible rulesets and inheritance
 """
-import os, sys, logging, json
+import os, re, sys, logging, json, time, threading, hashlib
+import importlib.util
 from pathlib import Path
 from typing import Dict, List, Optional
 from datetime import datetime, timezone
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from uuid import uuid4
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,10 +21,62 @@ sys.path.insert(0, str(ROOT_DIR))
 
 from flask import Flask, jsonify, request, render_template, g
 from flask_cors import CORS
+from werkzeug.exceptions import BadRequest
 
 app = Flask(__name__, template_folder='templates', static_folder='static', static_url_path='/static')
 CORS(app)
 
+# Optional faster JSON encoder/decoder for request bodies and the large
+# list/analysis responses
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def ojsonify(obj, status=200):
+    """Like jsonify, but encoded with orjson when it is installed"""
+    if orjson is not None:
+        try:
+            body = orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # Something orjson can't encode; let Flask's encoder try
+        else:
+            return app.response_class(body, status=status, mimetype='application/json')
+    response = jsonify(obj)
+    response.status_code = status
+    return response
+
+def json_bytes(obj):
+    """Encode obj to JSON bytes, with orjson when it is installed"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # Something orjson can't encode; let Flask's encoder try
+    return app.json.dumps(obj).encode()
+
+def snapshot_json(body, etag):
+    """Serve pre-encoded JSON with its ETag; 304 if the client already has it"""
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+def encode_snapshot(version, obj):
+    """(version, body, etag) for a response reused until version changes"""
+    body = json_bytes(obj)
+    return version, body, hashlib.blake2b(body, digest_size=16).hexdigest()
+
+def json_body():
+    """Parse the request body as JSON (orjson when installed), without
+    keeping a cached copy on the request; an empty body parses as {}"""
+    data = request.get_data(cache=False)
+    if not data:
+        return {}
+    try:
+        return orjson.loads(data) if orjson is not None else json.loads(data)
+    except ValueError as e:
+        raise BadRequest(f"Invalid JSON body: {e}")
+
 # Import nixo blueprint
 try:
     from nixo_routes import nixo_bp, init_nixo_services
@@ -36,6 +92,39 @@ def call_after_request_callbacks(response):
         callback(response)
     return response
 
+# Views that need the FeatureFlagClient; answered with 503 here, before any
+# request parsing, instead of each view checking for itself
+_REQUIRES_FF = frozenset({
+    'get_clients',
+    'get_client_details',
+    'get_rulesets',
+    'create_ruleset',
+    'check_feature',
+    'check_features_batch',
+    'kill_switch',
+    'list_targeting_rules',
+    'create_targeting_rule',
+    'update_targeting_rule',
+    'delete_targeting_rule',
+    'list_schedules',
+    'create_schedule',
+    'update_schedule',
+    'delete_schedule',
+    'get_upcoming_schedules',
+    'query_audit_logs',
+    'get_recent_activity',
+    'get_feature_history',
+    'get_dashboard_snapshot',
+    'check_feature_detailed',
+    'update_client_ruleset',
+    'create_client',
+})
+
+@app.before_request
+def _require_ff_client():
+    if ff_client is None and request.endpoint in _REQUIRES_FF:
+        return jsonify({"success": False, "error": "Not initialized"}), 503
+
 # Initialize clients
 ff_client = None
 supabase_client = None
@@ -79,14 +168,19 @@ try:
 except Exception as e:
     logger.warning(f"⚠️ AuditLogger: {e}")
 
-# Load FeatureFlagClient (with enhanced features)
+# Load FeatureFlagClient (with enhanced features). Its isEnabled result cache
+# is keyed on client, feature and user context and is tunable per deployment
+# (EVAL_CACHE_* env vars); flag changes made through the client invalidate it
 try:
-    from feature_flag_client import FeatureFlagClient
+    from feature_flag_client import FeatureFlagClient, EVAL_CACHE_TTL, EVAL_CACHE_MAX_ITEMS
     ff_client = FeatureFlagClient(
         config_path='rulesets.yaml',
         clients_path='clients.yaml',
+        rulesets_dir='rulesets.d',
         bootstrap_path='bootstrap_defaults.json',
         supabase_client=supabase_client,
+        eval_cache_ttl=EVAL_CACHE_TTL,
+        eval_cache_max=EVAL_CACHE_MAX_ITEMS,
         enable_targeting=True,
         enable_scheduling=True,
         enable_audit=True
@@ -95,13 +189,38 @@ try:
 except Exception as e:
     logger.warning(f"⚠️ FeatureFlagClient: {e}")
 
-# Load AST Analyzer
-try:
-    from enhanced_ast_analyzer import analyze_codebase_with_helpers, get_functions_for_feature
-    ast_analyzer = {'analyze': analyze_codebase_with_helpers, 'get_functions': get_functions_for_feature}
-    logger.info("✓ AST Analyzer loaded")
-except Exception as e:
-    logger.warning(f"⚠️ AST Analyzer: {e}")
+# AST Analyzer: imported on first use, since networkx makes it the slowest
+# import here and only /api/analyze needs it
+_ast_analyzer_lock = threading.Lock()
+_ast_analyzer_error = None
+_AST_DEPS_INSTALLED = importlib.util.find_spec('networkx') is not None
+
+def get_ast_analyzer():
+    """Load the AST analyzer once; None if it can't be imported"""
+    global ast_analyzer, _ast_analyzer_error
+    if ast_analyzer is None and _ast_analyzer_error is None:
+        with _ast_analyzer_lock:
+            if ast_analyzer is None and _ast_analyzer_error is None:
+                try:
+                    from enhanced_ast_analyzer import analyze_codebase_with_helpers, get_functions_for_feature
+                    from ast_callgraph_analyzer import analyze_file, build_graph_json
+                    ast_analyzer = {
+                        'analyze': analyze_codebase_with_helpers,
+                        'get_functions': get_functions_for_feature,
+                        'call_graph': analyze_file,
+                        'graph': build_graph_json
+                    }
+                    logger.info("✓ AST Analyzer loaded")
+                except Exception as e:
+                    _ast_analyzer_error = e
+                    logger.warning(f"⚠️ AST Analyzer: {e}")
+    return ast_analyzer
+
+def ast_analysis_available():
+    """Whether the AST analyzer is (or can be) loaded, without importing it"""
+    if ast_analyzer is not None:
+        return True
+    return _ast_analyzer_error is None and _AST_DEPS_INSTALLED
 
 # ============================================================================
 # FRONTEND ROUTES
@@ -129,17 +248,29 @@ def index():
 # API INFO & HEALTH
 # ============================================================================
 
-@app.route('/api')
-def api_info():
-    """API information"""
-    return jsonify({
+# Encoded /api and /health bodies, keyed on which components are loaded
+_static_bodies = {}
+
+def static_json(name, build):
+    """Serve a body that only depends on which components are loaded,
+    encoding it again only when that changes"""
+    loaded = (ff_client is not None, ast_analysis_available(), supabase_client is not None)
+    cached = _static_bodies.get(name)
+    if cached is None or cached[0] != loaded:
+        obj = build(*loaded)
+        body = orjson.dumps(obj) if orjson is not None else json.dumps(obj).encode()
+        cached = _static_bodies[name] = (loaded, body)
+    return app.response_class(cached[1], mimetype='application/json')
+
+def _api_info_body(feature_flags, ast_analysis, supabase):
+    return {
         "message": "Feature Flagging API",
         "version": "2.0",
         "status": "production",
         "features": {
-            "feature_flags": ff_client is not None,
-            "ast_analysis": ast_analyzer is not None,
-            "supabase": supabase_client is not None
+            "feature_flags": feature_flags,
+            "ast_analysis": ast_analysis,
+            "supabase": supabase
         },
         "endpoints": {
             "clients": "/api/clients",
@@ -148,38 +279,57 @@ def api_info():
             "projects": "/api/projects",
             "kill_switch": "/api/kill-switch"
         }
-    })
+    }
+
+def _health_body(feature_flags, ast_analysis, supabase):
+    return {
+        "status": "healthy",
+        "feature_flags": feature_flags,
+        "ast_analysis": ast_analysis,
+        "supabase": supabase
+    }
+
+@app.route('/api')
+def api_info():
+    """API information"""
+    return static_json('api_info', _api_info_body)
 
 @app.route('/health')
 def health():
     """Health check"""
-    return jsonify({
-        "status": "healthy",
-        "feature_flags": ff_client is not None,
-        "ast_analysis": ast_analyzer is not None,
-        "supabase": supabase_client is not None
-    })
+    return static_json('health', _health_body)
 
 # ============================================================================
 # CLIENT MANAGEMENT
 # ============================================================================
 
+# (config_version, body, etag) of the last /api/clients response, swapped as one
+_clients_snapshot = (None, None, None)
+
 @app.route('/api/clients')
 def get_clients():
     """Get all clients with features"""
-    if not ff_client:
-        return jsonify({"success": False, "error": "Feature flag client not initialized"}), 503
+    global _clients_snapshot
     try:
+        # Read the version first: a change while building bumps it again
+        version = ff_client.config_version
+        snapshot_version, body, etag = _clients_snapshot
+        if snapshot_version == version:
+            return snapshot_json(body, etag)
+        
         clients = ff_client.get_all_clients()
+        # Rulesets are shared between clients; resolve each one only once
+        client_features = ff_client.get_all_client_features()
         result = {}
         for client_id, client_data in clients.items():
-            features = list(ff_client.get_client_features(client_id))
+            features = list(client_features[client_id])
             result[client_id] = {
                 **client_data,
                 'features': features,
                 'feature_count': len(features)
             }
-        return jsonify({"success": True, "clients": result})
+        _clients_snapshot = snapshot = encode_snapshot(version, {"success": True, "clients": result})
+        return snapshot_json(snapshot[1], snapshot[2])
     except Exception as e:
         logger.error(f"Error getting clients: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
@@ -187,14 +337,11 @@ def get_clients():
 @app.route('/api/clients/<client_id>')
 def get_client_details(client_id):
     """Get specific client details"""
-    if not ff_client:
-        return jsonify({"success": False, "error": "Not initialized"}), 503
     try:
-        clients = ff_client.get_all_clients()
-        if client_id not in clients:
+        client_data = ff_client.get_client_info(client_id)
+        if client_data is None:
             return jsonify({"success": False, "error": "Client not found"}), 404
         
-        client_data = clients[client_id]
         features = list(ff_client.get_client_features(client_id))
         
         return jsonify({
@@ -213,24 +360,33 @@ def get_client_details(client_id):
 # RULESET MANAGEMENT
 # ============================================================================
 
+# Ruleset names double as fragment file names under rulesets.d/
+RULESET_NAME_PATTERN = re.compile(r'[A-Za-z0-9_-]+')
+
+# (config_version, body, etag) of the last /api/rulesets response, swapped as one
+_rulesets_snapshot = (None, None, None)
+
 @app.route('/api/rulesets')
 def get_rulesets():
     """Get all rulesets"""
-    if not ff_client:
-        return jsonify({"success": False, "error": "Not initialized"}), 503
+    global _rulesets_snapshot
     try:
+        version = ff_client.config_version
+        snapshot_version, body, etag = _rulesets_snapshot
+        if snapshot_version == version:
+            return snapshot_json(body, etag)
+
         rulesets = ff_client.get_all_rulesets()
-        return jsonify({"success": True, "rulesets": rulesets})
+        _rulesets_snapshot = snapshot = encode_snapshot(version, {"success": True, "rulesets": rulesets})
+        return snapshot_json(snapshot[1], snapshot[2])
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/rulesets', methods=['POST'])
 def create_ruleset():
     """Create new ruleset from analyzed codebase features"""
-    if not ff_client:
-        return jsonify({"success": False, "error": "Not initialized"}), 503
     try:
-        data = request.get_json()
+        data = json_body()
         ruleset_name = data.get('name')
         description = data.get('description', '')
         features = data.get('features', [])
@@ -238,31 +394,25 @@ def create_ruleset():
         
         if not ruleset_name or not features:
             return jsonify({"success": False, "error": "Name and features required"}), 400
+        if not RULESET_NAME_PATTERN.fullmatch(ruleset_name):
+            return jsonify({"success": False, "error": "Invalid ruleset name"}), 400
+        if ruleset_name in ff_client.engine.rulesets:
+            return jsonify({"success": False, "error": f"Ruleset '{ruleset_name}' already exists"}), 409
         
-        # Read current rulesets
-        import yaml
-        with open('rulesets.yaml', 'r') as f:
-            rulesets_data = yaml.safe_load(f) or {}
-        
-        # Add new ruleset
-        rulesets_data['rulesets'] = rulesets_data.get('rulesets', {})
-        rulesets_data['rulesets'][ruleset_name] = {
+        ruleset = {
             'description': description,
             'baseline_ruleset': baseline,
             'features': features
         }
         
-        # Save back
-        with open('rulesets.yaml', 'w') as f:
-            yaml.dump(rulesets_data, f, default_flow_style=False, sort_keys=False)
-        
-        # Reload the client
-        ff_client._load_configuration()
+        # Journal the ruleset as its own fragment; only that file is
+        # written and parsed, not the whole of rulesets.yaml
+        ff_client.add_ruleset(ruleset_name, ruleset)
         
         return jsonify({
             "success": True,
             "message": f"Ruleset '{ruleset_name}' created with {len(features)} features",
-            "ruleset": rulesets_data['rulesets'][ruleset_name]
+            "ruleset": ruleset
         })
     except Exception as e:
         logger.error(f"Error creating ruleset: {e}")
@@ -272,86 +422,140 @@ def create_ruleset():
 # AST ANALYSIS & CODEBASE INTEGRATION
 # ============================================================================
 
+# Limit on function records returned by /api/analyze (response size)
+MAX_ANALYZE_FUNCTIONS = 50
+
+
+def to_feature_name(func_name: str) -> str:
+    """Convert a function name to a feature name (snake_case, lowercase)"""
+    if func_name.isascii():
+        # For ASCII the title()/lower() round trip only lowercases
+        return func_name.replace(' ', '_').lower()
+    return func_name.replace('_', ' ').title().replace(' ', '_').lower()
+
+def run_analysis(codebase_path: str, project_name: str) -> Dict:
+    """Analyze a codebase and build the /api/analyze response payload"""
+    # Only the first-order call graph is needed here, so skip the
+    # helper/impact analysis of the analyzer's 'analyze'
+    logger.info(f"Analyzing codebase at: {codebase_path}")
+    analyzer = get_ast_analyzer()
+    call_graph, _, _ = analyzer['call_graph'](codebase_path)
+    graph_data = analyzer['graph'](call_graph, codebase_path)
+    
+    # Extract features from function names (public functions only)
+    public_nodes = [
+        node for node in graph_data.get('nodes', ())
+        if node.get('id') and node['id'][0] != '_'
+    ]
+    # Convert each distinct function name to a feature name once
+    feature_map = {
+        func_name: to_feature_name(func_name)
+        for func_name in {node['id'] for node in public_nodes}
+    }
+    # Only the first MAX_ANALYZE_FUNCTIONS records are built and returned
+    functions = [
+        {'name': node['id'], 'feature': feature_map[node['id']], 'file': node.get('file', 'unknown')}
+        for node in islice(public_nodes, MAX_ANALYZE_FUNCTIONS)
+    ]
+    
+    features_list = sorted(set(feature_map.values()))
+    
+    # Store in Supabase if available
+    project_id = None
+    if supabase_client:
+        try:
+            project = supabase_client.create_project(
+                name=project_name,
+                description=f"Analyzed from {codebase_path}",
+                repository_url=codebase_path,
+                metadata={'features': features_list, 'function_count': len(public_nodes)}
+            )
+            project_id = project.get('id')
+            invalidate_projects_snapshot()
+        except Exception as e:
+            logger.warning(f"Could not save to Supabase: {e}")
+    
+    return {
+        "success": True,
+        "project_id": project_id,
+        "project_name": project_name,
+        "features_found": len(features_list),
+        "features": features_list,
+        "functions": functions,
+        "total_functions": len(public_nodes),
+        "graph": {
+            "nodes": len(graph_data.get('nodes', [])),
+            "edges": len(graph_data.get('edges', []))
+        },
+        "suggested_ruleset_name": f"{project_name.lower().replace(' ', '_')}_features"
+    }
+
+# Background analyses started with /api/analyze?async=1: job_id -> Future
+_analyze_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='analyze')
+_analyze_jobs: Dict[str, Future] = {}
+_analyze_jobs_lock = threading.Lock()
+MAX_ANALYZE_JOBS = 100
+
 @app.route('/api/analyze', methods=['POST'])
 def analyze_codebase():
     """Analyze codebase and extract features for ruleset creation"""
-    if not ast_analyzer:
+    if not get_ast_analyzer():
         return jsonify({"success": False, "error": "AST analyzer not available"}), 503
     
     try:
-        data = request.get_json()
+        data = json_body()
         codebase_path = data.get('path')
         project_name = data.get('project_name', 'Analyzed Project')
         
         if not codebase_path:
             return jsonify({"success": False, "error": "Codebase path required"}), 400
         
-        # Analyze the codebase
-        logger.info(f"Analyzing codebase at: {codebase_path}")
-        graph_data = ast_analyzer['analyze'](codebase_path)
-        
-        # Extract features from function names
-        features = set()
-        functions = []
-        
-        if 'nodes' in graph_data:
-            for node in graph_data['nodes']:
-                func_name = node.get('id', '')
-                if func_name and not func_name.startswith('_'):
-                    # Convert function names to feature names
-                    feature_name = func_name.replace('_', ' ').title().replace(' ', '_').lower()
-                    features.add(feature_name)
-                    functions.append({
-                        'name': func_name,
-                        'feature': feature_name,
-                        'file': node.get('file', 'unknown')
-                    })
-        
-        features_list = sorted(list(features))
+        if request.args.get('async') == '1':
+            # Run off the request thread; poll /api/analyze/status/<job_id>
+            with _analyze_jobs_lock:
+                if len(_analyze_jobs) >= MAX_ANALYZE_JOBS:
+                    # Forget the oldest finished jobs (dicts keep insertion
+                    # order); a running job is never dropped
+                    finished = [job for job, future in _analyze_jobs.items() if future.done()]
+                    for job in finished[:len(_analyze_jobs) - MAX_ANALYZE_JOBS + 1]:
+                        del _analyze_jobs[job]
+                    if len(_analyze_jobs) >= MAX_ANALYZE_JOBS:
+                        return jsonify({"success": False, "error": "Too many analyses in progress"}), 503
+                job_id = uuid4().hex
+                _analyze_jobs[job_id] = _analyze_pool.submit(run_analysis, codebase_path, project_name)
+            return jsonify({"success": True, "job_id": job_id}), 202
         
-        # Store in Supabase if available
-        project_id = None
-        if supabase_client:
-            try:
-                project = supabase_client.create_project(
-                    name=project_name,
-                    description=f"Analyzed from {codebase_path}",
-                    repository_url=codebase_path,
-                    metadata={'features': features_list, 'function_count': len(functions)}
-                )
-                project_id = project.get('id')
-            except Exception as e:
-                logger.warning(f"Could not save to Supabase: {e}")
-        
-        return jsonify({
-            "success": True,
-            "project_id": project_id,
-            "project_name": project_name,
-            "features_found": len(features_list),
-            "features": features_list,
-            "functions": functions[:50],  # Limit for response size
-            "total_functions": len(functions),
-            "graph": {
-                "nodes": len(graph_data.get('nodes', [])),
-                "edges": len(graph_data.get('edges', []))
-            },
-            "suggested_ruleset_name": f"{project_name.lower().replace(' ', '_')}_features"
-        })
+        return ojsonify(run_analysis(codebase_path, project_name))
     except Exception as e:
         logger.error(f"Error analyzing codebase: {e}", exc_info=True)
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/api/analyze/status/<job_id>')
+def analyze_status(job_id):
+    """Status (and result, once finished) of a background analysis"""
+    with _analyze_jobs_lock:
+        future = _analyze_jobs.get(job_id)
+    if future is None:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+    if not future.done():
+        return jsonify({"success": True, "job_id": job_id, "done": False})
+    
+    error = future.exception()
+    if error is not None:
+        logger.error(f"Error analyzing codebase: {error}")
+        return jsonify({"success": False, "job_id": job_id, "done": True, "error": str(error)}), 500
+    return ojsonify({"success": True, "job_id": job_id, "done": True, "result": future.result()})
+
 @app.route('/api/analyze/preview', methods=['POST'])
 def preview_analysis():
     """Quick preview of what features would be extracted"""
-    data = request.get_json()
+    data = json_body()
     sample_functions = data.get('functions', [])
     
-    features = []
-    for func in sample_functions:
-        if not func.startswith('_'):
-            feature = func.replace('_', ' ').title().replace(' ', '_').lower()
-            features.append({"function": func, "feature": feature})
+    features = [
+        {"function": func, "feature": to_feature_name(func)}
+        for func in sample_functions if not func.startswith('_')
+    ]
     
     return jsonify({"success": True, "preview": features})
 
@@ -362,8 +566,6 @@ def preview_analysis():
 @app.route('/api/client/<client_id>/feature/<feature_name>')
 def check_feature(client_id, feature_name):
     """Check if feature is enabled for client"""
-    if not ff_client:
-        return jsonify({"success": False, "error": "Not initialized"}), 503
     try:
         user_id = request.args.get('user_id')
         context = {"user_id": user_id} if user_id else None
@@ -377,6 +579,27 @@ def check_feature(client_id, feature_name):
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/api/client/<client_id>/features/batch', methods=['POST'])
+def check_features_batch(client_id):
+    """Check several features for a client in one request"""
+    try:
+        data = json_body()
+        features = data.get('features')
+        context = data.get('context') or None
+
+        if not isinstance(features, list) or not all(isinstance(f, str) for f in features):
+            return jsonify({"success": False, "error": "features must be a list of names"}), 400
+        if context is not None and not isinstance(context, dict):
+            return jsonify({"success": False, "error": "context must be an object"}), 400
+
+        return jsonify({
+            "success": True,
+            "client_id": client_id,
+            "features": ff_client.isEnabledBatch(client_id, features, context)
+        })
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
 # ============================================================================
 # KILL SWITCH
 # ============================================================================
@@ -384,11 +607,9 @@ def check_feature(client_id, feature_name):
 @app.route('/api/kill-switch', methods=['GET', 'POST'])
 def kill_switch():
     """Manage global kill switch"""
-    if not ff_client:
-        return jsonify({"success": False, "error": "Not initialized"}), 503
     try:
         if request.method == 'POST':
-            activate = request.get_json().get('activate', False)
+            activate = json_body().get('activate', False)
             if activate:
                 ff_client.activate_kill_switch()
             else:
@@ -404,14 +625,29 @@ def kill_switch():
 # PROJECT MANAGEMENT (Supabase)
 # ============================================================================
 
+# Seconds a fetched project list is served before Supabase is asked again
+PROJECTS_TTL = 30
+
+# (expires_at, projects) of the last Supabase fetch, swapped as one
+_projects_snapshot = (0.0, None)
+
+def invalidate_projects_snapshot():
+    """Make the next /api/projects request fetch from Supabase"""
+    global _projects_snapshot
+    _projects_snapshot = (0.0, None)
+
 @app.route('/api/projects')
 def list_projects():
     """List all projects"""
+    global _projects_snapshot
     if not supabase_client:
         return jsonify({"success": True, "projects": [], "note": "Supabase not configured"}), 200
     try:
-        projects = supabase_client.list_projects()
-        return jsonify({"success": True, "projects": projects})
+        expires_at, projects = _projects_snapshot
+        if projects is None or time.monotonic() >= expires_at:
+            projects = supabase_client.list_projects()
+            _projects_snapshot = (time.monotonic() + PROJECTS_TTL, projects)
+        return ojsonify({"success": True, "projects": projects})
     except Exception as e:
         logger.error(f"Error listing projects: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
@@ -422,13 +658,14 @@ def create_project():
     if not supabase_client:
         return jsonify({"success": False, "error": "Supabase not configured"}), 503
     try:
-        data = request.get_json()
+        data = json_body()
         project = supabase_client.create_project(
             name=data.get('name'),
             description=data.get('description', ''),
             repository_url=data.get('repository_url', ''),
             metadata=data.get('metadata', {})
         )
+        invalidate_projects_snapshot()
         return jsonify({"success": True, "project": project})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -455,7 +692,7 @@ def create_api_key():
     if not api_key_manager:
         return jsonify({"success": False, "error": "API key management not available"}), 503
     try:
-        data = request.get_json()
+        data = json_body()
         name = data.get('name')
         if not name:
             return jsonify({"success": False, "error": "Name required"}), 400
@@ -507,22 +744,18 @@ def revoke_api_key(key_id):
 @app.route('/api/targeting-rules', methods=['GET'])
 def list_targeting_rules():
     """List all targeting rules"""
-    if not ff_client:
-        return jsonify({"success": False, "error": "Not initialized"}), 503
     try:
         feature_name = request.args.get('feature_name')
         rules = ff_client.list_targeting_rules(feature_name)
-        return jsonify({"success": True, "rules": rules})
+        return ojsonify({"success": True, "rules": rules})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/targeting-rules', methods=['POST'])
 def create_targeting_rule():
     """Create a new targeting rule"""
-    if not ff_client:
-        return jsonify({"success": False, "error": "Not initialized"}), 503
     try:
-        data = request.get_json()
+        data = json_body()
         required = ['name', 'feature_name', 'conditions']
         for field in required:
             if field not in data:
@@ -538,10 +771,8 @@ def create_targeting_rule():
 @app.route('/api/targeting-rules/<rule_id>', methods=['PUT'])
 def update_targeting_rule(rule_id):
     """Update a targeting rule"""
-    if not ff_client:
-        return jsonify({"success": False, "error": "Not initialized"}), 503
     try:
-        data = request.get_json()
+        data = json_body()
         success = ff_client.update_targeting_rule(rule_id, data)
         return jsonify({"success": success})
     except Exception as e:
@@ -550,8 +781,6 @@ def update_targeting_rule(rule_id):
 @app.route('/api/targeting-rules/<rule_id>', methods=['DELETE'])
 def delete_targeting_rule(rule_id):
     """Delete a targeting rule"""
-    if not ff_client:
-        return jsonify({"success": False, "error": "Not initialized"}), 503
     try:
         success = ff_client.delete_targeting_rule(rule_id)
         return jsonify({"success": success})
@@ -565,22 +794,18 @@ def delete_targeting_rule(rule_id):
 @app.route('/api/schedules', methods=['GET'])
 def list_schedules():
     """List all feature schedules"""
-    if not ff_client:
-        return jsonify({"success": False, "error": "Not initialized"}), 503
     try:
         feature_name = request.args.get('feature_name')
         schedules = ff_client.list_schedules(feature_name)
-        return jsonify({"success": True, "schedules": schedules})
+        return ojsonify({"success": True, "schedules": schedules})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/schedules', methods=['POST'])
 def create_schedule():
     """Create a new feature schedule"""
-    if not ff_client:
-        return jsonify({"success": False, "error": "Not initialized"}), 503
     try:
-        data = request.get_json()
+        data = json_body()
         required = ['feature_name', 'schedule_type']
         for field in required:
             if field not in data:
@@ -596,10 +821,8 @@ def create_schedule():
 @app.route('/api/schedules/<schedule_id>', methods=['PUT'])
 def update_schedule(schedule_id):
     """Update a schedule"""
-    if not ff_client:
-        return jsonify({"success": False, "error": "Not initialized"}), 503
     try:
-        data = request.get_json()
+        data = json_body()
         success = ff_client.update_schedule(schedule_id, data)
         return jsonify({"success": success})
     except Exception as e:
@@ -608,8 +831,6 @@ def update_schedule(schedule_id):
 @app.route('/api/schedules/<schedule_id>', methods=['DELETE'])
 def delete_schedule(schedule_id):
     """Delete a schedule"""
-    if not ff_client:
-        return jsonify({"success": False, "error": "Not initialized"}), 503
     try:
         success = ff_client.delete_schedule(schedule_id)
         return jsonify({"success": success})
@@ -619,12 +840,10 @@ def delete_schedule(schedule_id):
 @app.route('/api/schedules/upcoming', methods=['GET'])
 def get_upcoming_schedules():
     """Get schedules starting within next N hours"""
-    if not ff_client:
-        return jsonify({"success": False, "error": "Not initialized"}), 503
     try:
         hours = int(request.args.get('hours', 24))
         schedules = ff_client.get_upcoming_schedules(hours)
-        return jsonify({"success": True, "schedules": schedules})
+        return ojsonify({"success": True, "schedules": schedules})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -635,39 +854,66 @@ def get_upcoming_schedules():
 @app.route('/api/audit-logs', methods=['GET'])
 def query_audit_logs():
     """Query audit logs with filters"""
-    if not ff_client:
-        return jsonify({"success": False, "error": "Not initialized"}), 503
     try:
         entity_type = request.args.get('entity_type')
         entity_id = request.args.get('entity_id')
         limit = int(request.args.get('limit', 100))
 
         logs = ff_client.get_audit_logs(entity_type, entity_id, limit)
-        return jsonify({"success": True, "logs": logs})
+        return ojsonify({"success": True, "logs": logs})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/audit-logs/recent', methods=['GET'])
 def get_recent_activity():
     """Get recent activity"""
-    if not ff_client:
-        return jsonify({"success": False, "error": "Not initialized"}), 503
     try:
         hours = int(request.args.get('hours', 24))
         logs = ff_client.get_recent_activity(hours)
-        return jsonify({"success": True, "logs": logs})
+        return ojsonify({"success": True, "logs": logs})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/audit-logs/feature/<feature_name>', methods=['GET'])
 def get_feature_history(feature_name):
     """Get audit history for a feature"""
-    if not ff_client:
-        return jsonify({"success": False, "error": "Not initialized"}), 503
     try:
         limit = int(request.args.get('limit', 50))
         logs = ff_client.get_feature_history(feature_name, limit)
-        return jsonify({"success": True, "logs": logs})
+        return ojsonify({"success": True, "logs": logs})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+# ============================================================================
+# DASHBOARD
+# ============================================================================
+
+# Runs the independent Supabase reads of /api/dashboard/snapshot side by side
+_io_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='dashboard')
+
+@app.route('/api/dashboard/snapshot', methods=['GET'])
+def get_dashboard_snapshot():
+    """Targeting rules, schedules and audit logs in one response.
+
+    With feature_name, all three are scoped to that feature (logs are its
+    history); otherwise logs are the last `hours` (default 24) of activity.
+    """
+    try:
+        feature_name = request.args.get('feature_name')
+        if feature_name:
+            logs = _io_pool.submit(ff_client.get_feature_history, feature_name,
+                                   int(request.args.get('limit', 50)))
+        else:
+            logs = _io_pool.submit(ff_client.get_recent_activity,
+                                   int(request.args.get('hours', 24)))
+        rules = _io_pool.submit(ff_client.list_targeting_rules, feature_name)
+        schedules = _io_pool.submit(ff_client.list_schedules, feature_name)
+        return ojsonify({
+            "success": True,
+            "rules": rules.result(),
+            "schedules": schedules.result(),
+            "logs": logs.result()
+        })
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -678,16 +924,14 @@ def get_feature_history(feature_name):
 @app.route('/api/client/<client_id>/feature/<feature_name>/detailed')
 def check_feature_detailed(client_id, feature_name):
     """Check if feature is enabled with detailed evaluation info"""
-    if not ff_client:
-        return jsonify({"success": False, "error": "Not initialized"}), 503
     try:
-        # Build user context from query params
-        user_context = {}
-        for key, value in request.args.items():
-            if key not in ['_']:  # Skip cache buster
-                user_context[key] = value
+        # Build user context from query params, skipping the cache buster
+        args = request.args
+        user_context = None
+        if len(args) > ('_' in args):
+            user_context = {key: value for key, value in args.items() if key != '_'}
 
-        result = ff_client.isEnabledDetailed(client_id, feature_name, user_context or None)
+        result = ff_client.isEnabledDetailed(client_id, feature_name, user_context)
         return jsonify({"success": True, **result})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -699,10 +943,8 @@ def check_feature_detailed(client_id, feature_name):
 @app.route('/api/clients/<client_id>/ruleset', methods=['PUT'])
 def update_client_ruleset(client_id):
     """Update a client's ruleset"""
-    if not ff_client:
-        return jsonify({"success": False, "error": "Not initialized"}), 503
     try:
-        data = request.get_json()
+        data = json_body()
         new_ruleset = data.get('ruleset')
         if not new_ruleset:
             return jsonify({"success": False, "error": "Ruleset required"}), 400
@@ -725,13 +967,16 @@ def update_client_ruleset(client_id):
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+# Seconds clients.yaml writes from create_client are held back and coalesced.
+# Serverless instances (Vercel) may be frozen before a timer or exit hook
+# runs, so they write synchronously and report a failed write
+CLIENTS_SAVE_DELAY = 0.0 if os.environ.get('VERCEL') else 2.0
+
 @app.route('/api/clients', methods=['POST'])
 def create_client():
     """Create a new client"""
-    if not ff_client:
-        return jsonify({"success": False, "error": "Not initialized"}), 503
     try:
-        data = request.get_json()
+        data = json_body()
         client_id = data.get('client_id')
         ruleset = data.get('ruleset', 'baseline')
         metadata = data.get('metadata', {})
@@ -741,18 +986,16 @@ def create_client():
 
         ff_client.register_client(client_id, ruleset, metadata)
 
-        # Save to YAML
-        import yaml
-        with open('clients.yaml', 'r') as f:
-            clients_data = yaml.safe_load(f) or {}
+        # Save to YAML (parsed only if the file changed since the last read)
+        clients_data = ff_client.get_clients_config()
 
         clients_data[client_id] = {
             'ruleset': ruleset,
             'metadata': metadata
         }
 
-        with open('clients.yaml', 'w') as f:
-            yaml.dump(clients_data, f, default_flow_style=False, sort_keys=False)
+        # A burst of creates is written to the file once
+        ff_client.save_clients_config(clients_data, delay=CLIENTS_SAVE_DELAY)
 
         if audit_logger:
             audit_logger.log_client_change(
@@ -782,20 +1025,19 @@ def system_status():
             "features": {
                 "feature_flags": ff_client is not None,
                 "supabase": supabase_client is not None,
-                "ast_analysis": ast_analyzer is not None,
+                "ast_analysis": ast_analysis_available(),
                 "api_authentication": api_key_manager is not None,
                 "audit_logging": audit_logger is not None,
-                "targeting_rules": ff_client._targeting_engine is not None if ff_client else False,
-                "scheduling": ff_client._schedule_engine is not None if ff_client else False
+                "targeting_rules": ff_client.targeting_available() if ff_client else False,
+                "scheduling": ff_client.scheduling_available() if ff_client else False
             },
             "stats": {}
         }
 
         if ff_client:
-            clients = ff_client.get_all_clients()
-            rulesets = ff_client.get_all_rulesets()
-            status["stats"]["clients"] = len(clients)
-            status["stats"]["rulesets"] = len(rulesets)
+            client_count, ruleset_count = ff_client.get_counts()
+            status["stats"]["clients"] = client_count
+            status["stats"]["rulesets"] = ruleset_count
             status["stats"]["kill_switch_active"] = ff_client.engine._use_baseline
 
         return jsonify(status)
@@ -0,0 +1,36 @@
+-- ============================================================================
+-- NIXO CLIENT FEATURE CHECK - SINGLE-FEATURE LOOKUP
+-- ============================================================================
+-- Resolves one feature for one client and returns just the boolean, so a
+-- feature check doesn't transfer the client's whole resolved feature list.
+-- Same priority as get_client_features: active override, then the client's
+-- ruleset chain, then disabled.
+--
+-- Run once in Supabase SQL Editor, after add_nixo_feature_management.sql.
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION get_client_feature(
+    p_client_id VARCHAR(255),
+    p_feature_name VARCHAR(100)
+)
+RETURNS BOOLEAN AS $$
+SELECT COALESCE(
+    (
+        SELECT co.enabled
+        FROM client_overrides co
+        WHERE co.client_id = p_client_id
+        AND co.feature_name = p_feature_name
+        AND (co.expires_at IS NULL OR co.expires_at > NOW())
+        LIMIT 1
+    ),
+    (
+        SELECT grf.enabled
+        FROM client_rulesets cr
+        CROSS JOIN LATERAL get_ruleset_features(cr.ruleset_id) grf
+        WHERE cr.client_id = p_client_id
+        AND grf.feature_name = p_feature_name
+        LIMIT 1
+    ),
+    false
+);
+$$ LANGUAGE SQL STABLE;
@@ -0,0 +1,30 @@
+-- ============================================================================
+-- NIXO RULESET CHAIN - SINGLE-REQUEST INHERITANCE LOOKUP
+-- ============================================================================
+-- Returns a ruleset and all of its ancestors, so NixoRulesetService can load
+-- an inheritance chain in one request instead of one per level.
+--
+-- Run once in Supabase SQL Editor, after add_nixo_feature_management.sql.
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION get_ruleset_chain(p_ruleset_id UUID)
+RETURNS TABLE (
+    depth INT,
+    id UUID,
+    name VARCHAR(100),
+    inherits_from UUID
+) AS $$
+WITH RECURSIVE ruleset_chain AS (
+    SELECT id, name, inherits_from, 0 as depth, ARRAY[id] as path
+    FROM rulesets WHERE id = p_ruleset_id
+    UNION ALL
+    SELECT r.id, r.name, r.inherits_from, rc.depth + 1, rc.path || r.id
+    FROM rulesets r
+    INNER JOIN ruleset_chain rc ON r.id = rc.inherits_from
+    -- Stop at a cycle instead of recursing forever
+    WHERE NOT r.id = ANY(rc.path)
+)
+SELECT rc.depth, rc.id, rc.name, rc.inherits_from
+FROM ruleset_chain rc
+ORDER BY rc.depth;
+$$ LANGUAGE SQL STABLE;
@@ -0,0 +1,13 @@
+-- ============================================================================
+-- NIXO REALTIME - CACHE INVALIDATION EVENTS
+-- ============================================================================
+-- Publishes changes to the tables NixoRulesetService caches, so running
+-- instances drop stale entries right away instead of waiting for the TTL.
+--
+-- Run once in Supabase SQL Editor, after add_nixo_feature_management.sql.
+-- ============================================================================
+
+ALTER PUBLICATION supabase_realtime ADD TABLE rulesets;
+ALTER PUBLICATION supabase_realtime ADD TABLE ruleset_features;
+ALTER PUBLICATION supabase_realtime ADD TABLE client_rulesets;
+ALTER PUBLICATION supabase_realtime ADD TABLE feature_registry;
@@ -5,11 +5,49 @@ Flask blueprint providing API endpoints for the nixo feature management system.
 Includes endpoints for features, rulesets, clients, and overrides.
 """
 
+import functools
+import json
 import logging
-from flask import Blueprint, jsonify, request
+import time
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, current_app, g, jsonify, request
+
+from feature_flag_client import EVAL_CACHE_TTL, EVAL_CACHE_MAX_ITEMS
+
+# Optional faster JSON encoder/decoder for request bodies and list responses
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+
+def _dumps(obj) -> bytes:
+    """Encode one JSON value to bytes (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj).encode()
+
+
+def ojsonify(obj, status=200):
+    """Like jsonify, but encoded with orjson when it is installed."""
+    if orjson is not None:
+        try:
+            body = orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # Something orjson can't encode; let Flask's encoder try
+        else:
+            return current_app.response_class(body, status=status, mimetype='application/json')
+    response = jsonify(obj)
+    response.status_code = status
+    return response
+
+
+# Accepted spellings of boolean query params
+_TRUE_VALUES = frozenset({'true', '1', 'yes', 'on'})
+_FALSE_VALUES = frozenset({'false', '0', 'no', 'off'})
+
 # Create blueprint
 nixo_bp = Blueprint('nixo', __name__, url_prefix='/api/nixo')
 
@@ -17,6 +55,15 @@ nixo_bp = Blueprint('nixo', __name__, url_prefix='/api/nixo')
 _feature_sync = None
 _ruleset_service = None
 
+# Runs a handler's independent Supabase reads side by side
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='nixo')
+
+# Short-lived check_client_feature answers:
+# (client_id, feature_name) -> (expires_at, enabled)
+_check_cache = {}
+_CHECK_CACHE_TTL = EVAL_CACHE_TTL
+_CHECK_CACHE_MAX = EVAL_CACHE_MAX_ITEMS
+
 
 def init_nixo_services(supabase_client):
     """Initialize nixo services with Supabase client."""
@@ -29,6 +76,41 @@ def init_nixo_services(supabase_client):
     _ruleset_service = get_nixo_service(supabase_client)
 
 
+def _requires_ruleset_service(view):
+    """Answer 503 instead of running the view until the ruleset service is up."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if _ruleset_service is None:
+            return jsonify({"success": False, "error": "Service not initialized"}), 503
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@nixo_bp.before_request
+def _parse_json_body():
+    """Decode POST/PUT bodies once, up front (orjson when installed)."""
+    if request.method not in ('POST', 'PUT'):
+        return
+    body = request.get_data(cache=False)
+    try:
+        if not body:
+            g.json_body = {}
+        elif orjson is not None:
+            g.json_body = orjson.loads(body)
+        else:
+            g.json_body = json.loads(body)
+    except ValueError as e:
+        return jsonify({"success": False, "error": f"Invalid JSON body: {e}"}), 400
+
+
+@nixo_bp.after_request
+def _invalidate_check_cache(response):
+    """Drop cached feature checks after any successful nixo change."""
+    if request.method != 'GET' and response.status_code < 400 and _check_cache:
+        _check_cache.clear()
+    return response
+
+
 # =============================================================================
 # Feature Discovery Endpoints
 # =============================================================================
@@ -43,28 +125,38 @@ def get_features():
         - enforced: Filter by enforcement status (true/false)
     """
     try:
+        category = request.args.get('category')
+        enforced = request.args.get('enforced')
+        is_enforced = None
+        if enforced is not None:
+            enforced = enforced.lower()
+            if enforced in _TRUE_VALUES:
+                is_enforced = True
+            elif enforced in _FALSE_VALUES:
+                is_enforced = False
+            else:
+                return jsonify({"success": False, "error": "enforced must be true or false"}), 400
+
         if _ruleset_service:
-            features = _ruleset_service.get_all_features()
+            # Filtered in the registry query
+            features = _ruleset_service.get_all_features(category, is_enforced)
         elif _feature_sync:
             features = _feature_sync.get_all_features()
+            if category:
+                features = [f for f in features if f.get('category') == category]
+            if is_enforced is not None:
+                features = [f for f in features if f.get('is_enforced') is is_enforced]
         else:
             return jsonify({"success": False, "error": "Service not initialized"}), 503
 
-        # Apply filters
-        category = request.args.get('category')
-        enforced = request.args.get('enforced')
-
-        if category:
-            features = [f for f in features if f.get('category') == category]
-        if enforced is not None:
-            is_enforced = enforced.lower() == 'true'
-            features = [f for f in features if f.get('is_enforced') == is_enforced]
-
-        return jsonify({
+        response = ojsonify({
             "success": True,
             "features": features,
             "total": len(features)
         })
+        # An unchanged list isn't sent again
+        response.add_etag()
+        return response.make_conditional(request)
     except Exception as e:
         logger.error(f"Error getting features: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
@@ -80,6 +172,8 @@ def sync_features():
             return jsonify({"success": False, "error": "Feature sync not initialized"}), 503
 
         result = _feature_sync.sync_to_database()
+        if _ruleset_service:
+            _ruleset_service.invalidate_features()
         return jsonify(result)
     except Exception as e:
         logger.error(f"Error syncing features: {e}")
@@ -105,7 +199,7 @@ def get_categories():
         else:
             return jsonify({"success": False, "error": "Service not initialized"}), 503
 
-        return jsonify({
+        return ojsonify({
             "success": True,
             "categories": categories
         })
@@ -119,25 +213,27 @@ def get_categories():
 # =============================================================================
 
 @nixo_bp.route('/rulesets', methods=['GET'])
+@_requires_ruleset_service
 def get_rulesets():
     """Get all rulesets with summary info."""
     try:
-        if not _ruleset_service:
-            return jsonify({"success": False, "error": "Service not initialized"}), 503
-
         rulesets = _ruleset_service.get_all_rulesets()
 
-        return jsonify({
+        response = ojsonify({
             "success": True,
             "rulesets": rulesets,
             "total": len(rulesets)
         })
+        # An unchanged list isn't sent again
+        response.add_etag()
+        return response.make_conditional(request)
     except Exception as e:
         logger.error(f"Error getting rulesets: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
 
 @nixo_bp.route('/rulesets', methods=['POST'])
+@_requires_ruleset_service
 def create_ruleset():
     """
     Create a new ruleset.
@@ -153,15 +249,27 @@ def create_ruleset():
         - features: Optional list of {feature_name, enabled} to assign
     """
     try:
-        if not _ruleset_service:
-            return jsonify({"success": False, "error": "Service not initialized"}), 503
-
-        data = request.get_json()
+        data = g.json_body
 
         # Validate required fields
         if not data.get('name') or not data.get('display_name'):
             return jsonify({"success": False, "error": "name and display_name required"}), 400
 
+        # Features are saved in one upsert, which fails as a whole on a bad
+        # or repeated entry, so check them before creating anything
+        features = data.get('features') or []
+        if not isinstance(features, list) or not all(
+            isinstance(f, dict) and isinstance(f.get('feature_name'), str) for f in features
+        ):
+            return jsonify({"success": False, "error": "features must be a list of {feature_name, enabled}"}), 400
+        # A repeated feature keeps its last entry
+        features = list({f['feature_name']: f for f in features}.values())
+        if features:
+            known = {f['name'] for f in _ruleset_service.get_all_features()}
+            unknown = sorted(f['feature_name'] for f in features if f['feature_name'] not in known)
+            if unknown:
+                return jsonify({"success": False, "error": f"Unknown features: {', '.join(unknown)}"}), 400
+
         # Create ruleset
         ruleset = _ruleset_service.create_ruleset(
             name=data['name'],
@@ -177,16 +285,11 @@ def create_ruleset():
         if not ruleset:
             return jsonify({"success": False, "error": "Failed to create ruleset"}), 500
 
-        # Add features if provided
-        features = data.get('features', [])
-        if features:
-            for f in features:
-                _ruleset_service.set_ruleset_feature(
-                    ruleset['id'],
-                    f['feature_name'],
-                    f.get('enabled', True),
-                    f.get('config', {})
-                )
+        # Add features if provided (one upsert for all of them)
+        if features and not _ruleset_service.set_ruleset_features(ruleset['id'], features):
+            # Don't leave a ruleset behind without the features it was created with
+            _ruleset_service.delete_ruleset(ruleset['id'], data.get('created_by', 'api'))
+            return jsonify({"success": False, "error": "Failed to set ruleset features"}), 500
 
         return jsonify({
             "success": True,
@@ -198,12 +301,10 @@ def create_ruleset():
 
 
 @nixo_bp.route('/rulesets/<ruleset_id>', methods=['GET'])
+@_requires_ruleset_service
 def get_ruleset(ruleset_id):
     """Get a single ruleset by ID."""
     try:
-        if not _ruleset_service:
-            return jsonify({"success": False, "error": "Service not initialized"}), 503
-
         ruleset = _ruleset_service.get_ruleset(ruleset_id)
         if not ruleset:
             return jsonify({"success": False, "error": "Ruleset not found"}), 404
@@ -218,6 +319,7 @@ def get_ruleset(ruleset_id):
 
 
 @nixo_bp.route('/rulesets/<ruleset_id>', methods=['PUT'])
+@_requires_ruleset_service
 def update_ruleset(ruleset_id):
     """
     Update a ruleset.
@@ -225,10 +327,7 @@ def update_ruleset(ruleset_id):
     Body: Fields to update (display_name, description, color, icon, inherits_from)
     """
     try:
-        if not _ruleset_service:
-            return jsonify({"success": False, "error": "Service not initialized"}), 503
-
-        data = request.get_json()
+        data = g.json_body
         updated_by = data.pop('updated_by', 'api')
 
         success = _ruleset_service.update_ruleset(ruleset_id, data, updated_by)
@@ -242,12 +341,10 @@ def update_ruleset(ruleset_id):
 
 
 @nixo_bp.route('/rulesets/<ruleset_id>', methods=['DELETE'])
+@_requires_ruleset_service
 def delete_ruleset(ruleset_id):
     """Delete a ruleset."""
     try:
-        if not _ruleset_service:
-            return jsonify({"success": False, "error": "Service not initialized"}), 503
-
         deleted_by = request.args.get('deleted_by', 'api')
         success = _ruleset_service.delete_ruleset(ruleset_id, deleted_by)
 
@@ -258,6 +355,7 @@ def delete_ruleset(ruleset_id):
 
 
 @nixo_bp.route('/rulesets/<ruleset_id>/clone', methods=['POST'])
+@_requires_ruleset_service
 def clone_ruleset(ruleset_id):
     """
     Clone a ruleset.
@@ -267,10 +365,7 @@ def clone_ruleset(ruleset_id):
         - display_name: New display name
     """
     try:
-        if not _ruleset_service:
-            return jsonify({"success": False, "error": "Service not initialized"}), 503
-
-        data = request.get_json()
+        data = g.json_body
 
         if not data.get('name') or not data.get('display_name'):
             return jsonify({"success": False, "error": "name and display_name required"}), 400
@@ -295,12 +390,10 @@ def clone_ruleset(ruleset_id):
 
 
 @nixo_bp.route('/rulesets/<ruleset_id>/features', methods=['GET'])
+@_requires_ruleset_service
 def get_ruleset_features(ruleset_id):
     """Get resolved features for a ruleset (including inherited)."""
     try:
-        if not _ruleset_service:
-            return jsonify({"success": False, "error": "Service not initialized"}), 503
-
         include_inherited = request.args.get('include_inherited', 'true').lower() == 'true'
 
         if include_inherited:
@@ -308,7 +401,7 @@ def get_ruleset_features(ruleset_id):
         else:
             features = _ruleset_service.get_ruleset_direct_features(ruleset_id)
 
-        return jsonify({
+        return ojsonify({
             "success": True,
             "features": features,
             "total": len(features)
@@ -319,6 +412,7 @@ def get_ruleset_features(ruleset_id):
 
 
 @nixo_bp.route('/rulesets/<ruleset_id>/features', methods=['PUT'])
+@_requires_ruleset_service
 def update_ruleset_features(ruleset_id):
     """
     Bulk update features for a ruleset.
@@ -327,10 +421,7 @@ def update_ruleset_features(ruleset_id):
         - features: List of {feature_name, enabled, config}
     """
     try:
-        if not _ruleset_service:
-            return jsonify({"success": False, "error": "Service not initialized"}), 503
-
-        data = request.get_json()
+        data = g.json_body
         features = data.get('features', [])
         updated_by = data.get('updated_by', 'api')
 
@@ -345,15 +436,13 @@ def update_ruleset_features(ruleset_id):
 
 
 @nixo_bp.route('/rulesets/templates', methods=['GET'])
+@_requires_ruleset_service
 def get_template_rulesets():
     """Get all template rulesets for quick start."""
     try:
-        if not _ruleset_service:
-            return jsonify({"success": False, "error": "Service not initialized"}), 503
-
         templates = _ruleset_service.get_template_rulesets()
 
-        return jsonify({
+        return ojsonify({
             "success": True,
             "templates": templates
         })
@@ -367,12 +456,10 @@ def get_template_rulesets():
 # =============================================================================
 
 @nixo_bp.route('/clients', methods=['GET'])
+@_requires_ruleset_service
 def get_clients():
     """Get all clients with their ruleset info."""
     try:
-        if not _ruleset_service:
-            return jsonify({"success": False, "error": "Service not initialized"}), 503
-
         clients = _ruleset_service.get_all_clients()
 
         # Optional: filter by ruleset
@@ -380,37 +467,43 @@ def get_clients():
         if ruleset_id:
             clients = [c for c in clients if c.get('ruleset_id') == ruleset_id]
 
-        return jsonify({
+        response = ojsonify({
             "success": True,
             "clients": clients,
             "total": len(clients)
         })
+        # Still a Supabase read, but an unchanged list isn't sent again
+        response.add_etag()
+        return response.make_conditional(request)
     except Exception as e:
         logger.error(f"Error getting clients: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
 
 @nixo_bp.route('/clients/<client_id>', methods=['GET'])
+@_requires_ruleset_service
 def get_client(client_id):
     """Get a single client with full details."""
     try:
-        if not _ruleset_service:
-            return jsonify({"success": False, "error": "Service not initialized"}), 503
+        # The three reads are independent, so run them concurrently
+        client = _executor.submit(_ruleset_service.get_client, client_id)
+        features = _executor.submit(_ruleset_service.get_client_resolved_features, client_id)
+        overrides = _executor.submit(_ruleset_service.get_client_overrides, client_id)
 
-        client = _ruleset_service.get_client(client_id)
+        client = client.result()
         if not client:
             return jsonify({"success": False, "error": "Client not found"}), 404
 
         # Include resolved features
-        features = _ruleset_service.get_client_resolved_features(client_id)
-        overrides = _ruleset_service.get_client_overrides(client_id)
+        features = features.result()
+        overrides = overrides.result()
 
-        return jsonify({
+        return ojsonify({
             "success": True,
             "client": client,
             "features": features,
             "overrides": overrides,
-            "feature_count": len([f for f in features if f.get('enabled')])
+            "feature_count": sum(1 for f in features if f.get('enabled'))
         })
     except Exception as e:
         logger.error(f"Error getting client: {e}")
@@ -418,6 +511,7 @@ def get_client(client_id):
 
 
 @nixo_bp.route('/clients/<client_id>/ruleset', methods=['PUT'])
+@_requires_ruleset_service
 def assign_client_ruleset(client_id):
     """
     Assign a ruleset to a client.
@@ -427,10 +521,7 @@ def assign_client_ruleset(client_id):
         - notes: Optional notes about the assignment
     """
     try:
-        if not _ruleset_service:
-            return jsonify({"success": False, "error": "Service not initialized"}), 503
-
-        data = request.get_json()
+        data = g.json_body
         ruleset_id = data.get('ruleset_id')
 
         if not ruleset_id:
@@ -450,19 +541,17 @@ def assign_client_ruleset(client_id):
 
 
 @nixo_bp.route('/clients/<client_id>/features', methods=['GET'])
+@_requires_ruleset_service
 def get_client_features(client_id):
     """Get final resolved features for a client."""
     try:
-        if not _ruleset_service:
-            return jsonify({"success": False, "error": "Service not initialized"}), 503
-
         features = _ruleset_service.get_client_resolved_features(client_id)
 
-        return jsonify({
+        return ojsonify({
             "success": True,
             "client_id": client_id,
             "features": features,
-            "enabled_count": len([f for f in features if f.get('enabled')]),
+            "enabled_count": sum(1 for f in features if f.get('enabled')),
             "total": len(features)
         })
     except Exception as e:
@@ -471,16 +560,28 @@ def get_client_features(client_id):
 
 
 @nixo_bp.route('/clients/<client_id>/check/<feature_name>', methods=['GET'])
+@_requires_ruleset_service
 def check_client_feature(client_id, feature_name):
     """
     Check if a specific feature is enabled for a client.
     This is the main feature flag check endpoint.
     """
     try:
-        if not _ruleset_service:
-            return jsonify({"success": False, "error": "Service not initialized"}), 503
-
-        enabled = _ruleset_service.has_feature(client_id, feature_name)
+        key = (client_id, feature_name)
+        entry = _check_cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            enabled = entry[1]
+        else:
+            enabled = _ruleset_service.has_feature(client_id, feature_name)
+            if _CHECK_CACHE_TTL > 0:
+                if len(_check_cache) >= _CHECK_CACHE_MAX:
+                    # Evict the oldest entry (dicts keep insertion order)
+                    try:
+                        _check_cache.pop(next(iter(_check_cache), None), None)
+                    except RuntimeError:
+                        # Another thread resized the dict mid-lookup; skip eviction
+                        pass
+                _check_cache[key] = (time.monotonic() + _CHECK_CACHE_TTL, enabled)
 
         return jsonify({
             "success": True,
@@ -498,15 +599,13 @@ def check_client_feature(client_id, feature_name):
 # =============================================================================
 
 @nixo_bp.route('/clients/<client_id>/overrides', methods=['GET'])
+@_requires_ruleset_service
 def get_client_overrides(client_id):
     """Get all overrides for a client."""
     try:
-        if not _ruleset_service:
-            return jsonify({"success": False, "error": "Service not initialized"}), 503
-
         overrides = _ruleset_service.get_client_overrides(client_id)
 
-        return jsonify({
+        return ojsonify({
             "success": True,
             "overrides": overrides,
             "total": len(overrides)
@@ -517,6 +616,7 @@ def get_client_overrides(client_id):
 
 
 @nixo_bp.route('/clients/<client_id>/overrides', methods=['POST'])
+@_requires_ruleset_service
 def add_client_override(client_id):
     """
     Add a feature override for a client.
@@ -528,10 +628,7 @@ def add_client_override(client_id):
         - expires_at: Optional ISO8601 expiration datetime
     """
     try:
-        if not _ruleset_service:
-            return jsonify({"success": False, "error": "Service not initialized"}), 503
-
-        data = request.get_json()
+        data = g.json_body
 
         if not data.get('feature_name'):
             return jsonify({"success": False, "error": "feature_name required"}), 400
@@ -561,6 +658,7 @@ def add_client_override(client_id):
 
 
 @nixo_bp.route('/clients/<client_id>/overrides/<feature_name>', methods=['PUT'])
+@_requires_ruleset_service
 def update_client_override(client_id, feature_name):
     """
     Update an existing override.
@@ -568,10 +666,7 @@ def update_client_override(client_id, feature_name):
     Body: Fields to update (enabled, reason, expires_at)
     """
     try:
-        if not _ruleset_service:
-            return jsonify({"success": False, "error": "Service not initialized"}), 503
-
-        data = request.get_json()
+        data = g.json_body
         updated_by = data.pop('updated_by', 'api')
 
         success = _ruleset_service.update_client_override(
@@ -585,12 +680,10 @@ def update_client_override(client_id, feature_name):
 
 
 @nixo_bp.route('/clients/<client_id>/overrides/<feature_name>', methods=['DELETE'])
+@_requires_ruleset_service
 def remove_client_override(client_id, feature_name):
     """Remove an override."""
     try:
-        if not _ruleset_service:
-            return jsonify({"success": False, "error": "Service not initialized"}), 503
-
         removed_by = request.args.get('removed_by', 'api')
         success = _ruleset_service.remove_client_override(
             client_id, feature_name, removed_by
@@ -607,6 +700,7 @@ def remove_client_override(client_id, feature_name):
 # =============================================================================
 
 @nixo_bp.route('/audit-logs', methods=['GET'])
+@_requires_ruleset_service
 def get_audit_logs():
     """
     Query audit logs.
@@ -617,20 +711,24 @@ def get_audit_logs():
         - limit: Max number of results (default: 100)
     """
     try:
-        if not _ruleset_service:
-            return jsonify({"success": False, "error": "Service not initialized"}), 503
-
         entity_type = request.args.get('entity_type')
         entity_id = request.args.get('entity_id')
         limit = int(request.args.get('limit', 100))
 
-        logs = _ruleset_service.get_audit_logs(entity_type, entity_id, limit)
+        pages = _ruleset_service.iter_audit_log_pages(entity_type, entity_id, limit)
 
-        return jsonify({
-            "success": True,
-            "logs": logs,
-            "total": len(logs)
-        })
+        # Stream page by page, so only one page of rows is held at a time
+        def generate():
+            total = 0
+            yield b'{"success":true,"logs":['
+            for page in pages:
+                if total:
+                    yield b','
+                yield b','.join(map(_dumps, page))
+                total += len(page)
+            yield b'],"total":%d}' % total
+
+        return current_app.response_class(generate(), mimetype='application/json')
     except Exception as e:
         logger.error(f"Error getting audit logs: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
@@ -5,14 +5,66 @@ Provides ruleset resolution with inheritance chain support, client overrides,
 and feature flag evaluation for the nixo feature management system.
 """
 
+import functools
 import logging
-from typing import Dict, List, Optional, Set, Any, Tuple
+import threading
+import time
+from concurrent.futures import Future
+from operator import itemgetter
+from typing import Dict, Iterator, List, Optional, Set, Any, Tuple
 from datetime import datetime, timezone
 from uuid import UUID
 import json
 
 logger = logging.getLogger(__name__)
 
+# Rows fetched per request when paging through audit logs
+_AUDIT_PAGE_SIZE = 500
+
+
+class SingleFlight:
+    """
+    Merge concurrent identical calls.
+
+    While a call for a key is running, other callers with the same key wait
+    for it and share its result (or exception) instead of repeating it.
+    Nothing is kept once the call finishes, so results are never stale.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Any, Future] = {}
+
+    def do(self, key: Any, fn, *args):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+def _single_flight(method):
+    """Run a service read through the instance's SingleFlight, keyed on its arguments."""
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        return self._inflight.do((method.__name__, *args), method, self, *args)
+    return wrapper
+
 
 class NixoRulesetService:
     """
@@ -30,23 +82,134 @@ class NixoRulesetService:
         self._ruleset_cache: Dict[str, Dict] = {}
         self._feature_cache: Dict[str, Dict] = {}
         self._cache_ttl = 60  # seconds
+        # Concurrent identical reads share one Supabase round trip
+        self._inflight = SingleFlight()
+        if self.supabase:
+            self._subscribe_to_changes()
+
+    # =========================================================================
+    # Read Cache
+    # =========================================================================
+
+    def _cache_get(self, bucket: Dict, key: Any) -> Any:
+        """
+        Get a cached value, or None if it is missing or expired.
+
+        Cached values are shared between callers and must not be modified.
+        """
+        entry = bucket.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def _cache_put(self, bucket: Dict, key: Any, value: Any) -> None:
+        """Cache a value for _cache_ttl seconds. None is never cached."""
+        if value is not None:
+            bucket[key] = (time.monotonic() + self._cache_ttl, value)
+
+    def _invalidate_ruleset(self, ruleset_id: Optional[str] = None) -> None:
+        """
+        Drop cached data for a ruleset after a change.
+
+        The ruleset list and templates are always dropped, since the summary
+        view also counts each ruleset's features and clients.
+        """
+        if ruleset_id:
+            entry = self._ruleset_cache.pop(ruleset_id, None)
+            if entry is not None:
+                self._ruleset_cache.pop(f"name:{entry[1].get('name')}", None)
+        self._ruleset_cache.pop("ALL", None)
+        self._ruleset_cache.pop("TEMPLATES", None)
+
+    def invalidate_features(self) -> None:
+        """Drop cached registry reads, e.g. after a feature sync."""
+        self._feature_cache.clear()
+
+    def _subscribe_to_changes(self) -> None:
+        """
+        Invalidate cached data as soon as Supabase reports a change.
+
+        Needs a Supabase client with Realtime support and the tables in the
+        supabase_realtime publication (migrations/enable_nixo_realtime.sql).
+        Without them, changes made by other instances show up once cached
+        entries expire after _cache_ttl.
+        """
+        channel = getattr(self.supabase.client, "channel", None)
+        if channel is None:
+            logger.info("Supabase Realtime not available, nixo cache uses TTL only")
+            return
+
+        try:
+            channel("nixo_cache") \
+                .on_postgres_changes(event="*", schema="public", table="rulesets",
+                                     callback=self._on_ruleset_change) \
+                .on_postgres_changes(event="*", schema="public", table="ruleset_features",
+                                     callback=self._on_ruleset_feature_change) \
+                .on_postgres_changes(event="*", schema="public", table="client_rulesets",
+                                     callback=self._on_client_ruleset_change) \
+                .on_postgres_changes(event="*", schema="public", table="feature_registry",
+                                     callback=self._on_feature_change) \
+                .subscribe()
+        except Exception as e:
+            # The synchronous client raises NotImplementedError here
+            logger.info(f"Could not subscribe to nixo changes, cache uses TTL only: {e}")
+
+    @staticmethod
+    def _changed_rows(payload: Dict) -> List[Dict]:
+        """Get the new and old rows from a Realtime change payload."""
+        data = payload.get("data", payload)
+        return [row for row in (data.get("record"), data.get("old_record")) if row]
+
+    def _on_ruleset_change(self, payload: Dict) -> None:
+        for row in self._changed_rows(payload):
+            self._invalidate_ruleset(row.get("id"))
+
+    def _on_ruleset_feature_change(self, payload: Dict) -> None:
+        for row in self._changed_rows(payload):
+            self._invalidate_ruleset(row.get("ruleset_id"))
+
+    def _on_client_ruleset_change(self, payload: Dict) -> None:
+        self._invalidate_ruleset()
+
+    def _on_feature_change(self, payload: Dict) -> None:
+        self.invalidate_features()
 
     # =========================================================================
     # Feature Registry Operations
     # =========================================================================
 
-    def get_all_features(self) -> List[Dict]:
-        """Get all features from the registry."""
+    def get_all_features(
+        self,
+        category: Optional[str] = None,
+        is_enforced: Optional[bool] = None
+    ) -> List[Dict]:
+        """
+        Get features from the registry.
+
+        Filters are applied by the database, so only matching rows are
+        transferred.
+        """
         if not self.supabase:
             return []
 
+        key = ("ALL", category, is_enforced)
+        features = self._cache_get(self._feature_cache, key)
+        if features is not None:
+            return features
+
         try:
-            result = self.supabase.client.table("feature_registry") \
-                .select("*") \
+            query = self.supabase.client.table("feature_registry").select("*")
+            if category:
+                query = query.eq("category", category)
+            if is_enforced is not None:
+                query = query.eq("is_enforced", is_enforced)
+            result = query \
                 .order("category", desc=False) \
                 .order("name", desc=False) \
                 .execute()
-            return result.data or []
+            features = result.data or []
+            self._cache_put(self._feature_cache, key, features)
+            return features
         except Exception as e:
             logger.error(f"Failed to get features: {e}")
             return []
@@ -58,9 +221,10 @@ class NixoRulesetService:
 
         for feature in features:
             category = feature.get("category", "Other")
-            if category not in by_category:
-                by_category[category] = []
-            by_category[category].append(feature)
+            category_features = by_category.get(category)
+            if category_features is None:
+                category_features = by_category[category] = []
+            category_features.append(feature)
 
         return by_category
 
@@ -69,12 +233,17 @@ class NixoRulesetService:
         if not self.supabase:
             return None
 
+        feature = self._cache_get(self._feature_cache, feature_name)
+        if feature is not None:
+            return feature
+
         try:
             result = self.supabase.client.table("feature_registry") \
                 .select("*") \
                 .eq("name", feature_name) \
                 .single() \
                 .execute()
+            self._cache_put(self._feature_cache, feature_name, result.data)
             return result.data
         except Exception as e:
             logger.error(f"Failed to get feature {feature_name}: {e}")
@@ -84,16 +253,23 @@ class NixoRulesetService:
     # Ruleset Operations
     # =========================================================================
 
+    @_single_flight
     def get_all_rulesets(self) -> List[Dict]:
         """Get all rulesets with summary info."""
         if not self.supabase:
             return []
 
+        rulesets = self._cache_get(self._ruleset_cache, "ALL")
+        if rulesets is not None:
+            return rulesets
+
         try:
             result = self.supabase.client.table("ruleset_summary") \
                 .select("*") \
                 .execute()
-            return result.data or []
+            rulesets = result.data or []
+            self._cache_put(self._ruleset_cache, "ALL", rulesets)
+            return rulesets
         except Exception as e:
             logger.warning(f"Could not get ruleset_summary view, falling back: {e}")
             # Fallback to direct query
@@ -101,7 +277,9 @@ class NixoRulesetService:
                 result = self.supabase.client.table("rulesets") \
                     .select("*") \
                     .execute()
-                return result.data or []
+                rulesets = result.data or []
+                self._cache_put(self._ruleset_cache, "ALL", rulesets)
+                return rulesets
             except Exception as e2:
                 logger.error(f"Failed to get rulesets: {e2}")
                 return []
@@ -111,12 +289,17 @@ class NixoRulesetService:
         if not self.supabase:
             return None
 
+        ruleset = self._cache_get(self._ruleset_cache, ruleset_id)
+        if ruleset is not None:
+            return ruleset
+
         try:
             result = self.supabase.client.table("rulesets") \
                 .select("*") \
                 .eq("id", ruleset_id) \
                 .single() \
                 .execute()
+            self._cache_put(self._ruleset_cache, ruleset_id, result.data)
             return result.data
         except Exception as e:
             logger.error(f"Failed to get ruleset {ruleset_id}: {e}")
@@ -127,13 +310,23 @@ class NixoRulesetService:
         if not self.supabase:
             return None
 
+        key = f"name:{name}"
+        ruleset = self._cache_get(self._ruleset_cache, key)
+        if ruleset is not None:
+            return ruleset
+
         try:
             result = self.supabase.client.table("rulesets") \
                 .select("*") \
                 .eq("name", name) \
                 .single() \
                 .execute()
-            return result.data
+            ruleset = result.data
+            if ruleset:
+                # Also serves later get_ruleset calls by ID
+                self._cache_put(self._ruleset_cache, key, ruleset)
+                self._cache_put(self._ruleset_cache, ruleset["id"], ruleset)
+            return ruleset
         except Exception as e:
             logger.error(f"Failed to get ruleset by name {name}: {e}")
             return None
@@ -168,6 +361,7 @@ class NixoRulesetService:
             result = self.supabase.client.table("rulesets") \
                 .insert(data) \
                 .execute()
+            self._invalidate_ruleset()
 
             if result.data:
                 self._log_audit("create_ruleset", "ruleset", result.data[0]["id"], {
@@ -201,6 +395,7 @@ class NixoRulesetService:
                 .update(safe_updates) \
                 .eq("id", ruleset_id) \
                 .execute()
+            self._invalidate_ruleset(ruleset_id)
 
             if result.data:
                 self._log_audit("update_ruleset", "ruleset", ruleset_id, {
@@ -226,6 +421,8 @@ class NixoRulesetService:
                 .delete() \
                 .eq("id", ruleset_id) \
                 .execute()
+            # Children of the deleted ruleset lose their parent too
+            self._ruleset_cache.clear()
 
             self._log_audit("delete_ruleset", "ruleset", ruleset_id, {
                 "before": current
@@ -268,15 +465,11 @@ class NixoRulesetService:
             if not new_ruleset:
                 return None
 
-            # Copy features
-            features = self.get_ruleset_direct_features(source_id)
-            for feature in features:
-                self.set_ruleset_feature(
-                    new_ruleset["id"],
-                    feature["feature_name"],
-                    feature["enabled"],
-                    feature.get("config", {})
-                )
+            # Copy features in one write
+            self.set_ruleset_features(
+                new_ruleset["id"],
+                self.get_ruleset_direct_features(source_id)
+            )
 
             return new_ruleset
         except Exception as e:
@@ -288,12 +481,18 @@ class NixoRulesetService:
         if not self.supabase:
             return []
 
+        templates = self._cache_get(self._ruleset_cache, "TEMPLATES")
+        if templates is not None:
+            return templates
+
         try:
             result = self.supabase.client.table("rulesets") \
                 .select("*") \
                 .eq("is_template", True) \
                 .execute()
-            return result.data or []
+            templates = result.data or []
+            self._cache_put(self._ruleset_cache, "TEMPLATES", templates)
+            return templates
         except Exception as e:
             logger.error(f"Failed to get templates: {e}")
             return []
@@ -317,6 +516,33 @@ class NixoRulesetService:
             logger.error(f"Failed to get ruleset features: {e}")
             return []
 
+    def _get_direct_features_bulk(self, ruleset_ids: List[str]) -> Dict[str, List[Dict]]:
+        """
+        Get the direct features of several rulesets in one query.
+
+        Returns {ruleset_id: [{ruleset_id, feature_name, enabled}, ...]}.
+        Rulesets without features are missing from the result.
+        """
+        by_ruleset: Dict[str, List[Dict]] = {}
+        if not ruleset_ids:
+            return by_ruleset
+
+        try:
+            result = self.supabase.client.table("ruleset_features") \
+                .select("ruleset_id, feature_name, enabled") \
+                .in_("ruleset_id", ruleset_ids) \
+                .execute()
+        except Exception as e:
+            logger.error(f"Failed to get ruleset features: {e}")
+            return by_ruleset
+
+        for row in result.data or []:
+            rows = by_ruleset.get(row["ruleset_id"])
+            if rows is None:
+                rows = by_ruleset[row["ruleset_id"]] = []
+            rows.append(row)
+        return by_ruleset
+
     def get_ruleset_resolved_features(self, ruleset_id: str) -> List[Dict]:
         """
         Get all features for a ruleset including inherited ones.
@@ -340,29 +566,50 @@ class NixoRulesetService:
         """
         Python fallback for feature resolution with inheritance.
         """
-        resolved = {}
+        # feature_name -> (enabled, index into chain); rows are only turned
+        # into dicts once the winning ruleset for each feature is known
+        resolved: Dict[str, Tuple[Any, int]] = {}
         chain = self._get_inheritance_chain(ruleset_id)
+        get_row = itemgetter("feature_name", "enabled")
+        # One query for the features of every ruleset in the chain
+        by_ruleset = self._get_direct_features_bulk([link[1] for link in chain])
 
         # Process from oldest ancestor to current (reverse order)
-        for depth, rs_id, rs_name in reversed(chain):
-            features = self.get_ruleset_direct_features(rs_id)
-            for f in features:
-                feature_name = f["feature_name"]
-                resolved[feature_name] = {
-                    "feature_name": feature_name,
-                    "enabled": f["enabled"],
-                    "source_ruleset_id": rs_id,
-                    "source_ruleset_name": rs_name,
-                    "is_inherited": depth > 0
-                }
+        for i in range(len(chain) - 1, -1, -1):
+            features = by_ruleset.get(chain[i][1], ())
+            for feature_name, enabled in map(get_row, features):
+                resolved[feature_name] = (enabled, i)
 
-        return list(resolved.values())
+        return [
+            {
+                "feature_name": feature_name,
+                "enabled": enabled,
+                "source_ruleset_id": chain[i][1],
+                "source_ruleset_name": chain[i][2],
+                "is_inherited": chain[i][0] > 0
+            }
+            for feature_name, (enabled, i) in resolved.items()
+        ]
 
     def _get_inheritance_chain(self, ruleset_id: str) -> List[Tuple[int, str, str]]:
         """
         Get the inheritance chain for a ruleset.
         Returns list of (depth, ruleset_id, ruleset_name) tuples.
+
+        Uses the get_ruleset_chain database function to fetch the whole chain
+        in one request, and falls back to walking it one ruleset at a time.
         """
+        try:
+            result = self.supabase.client.rpc(
+                "get_ruleset_chain",
+                {"p_ruleset_id": ruleset_id}
+            ).execute()
+            rows = sorted(result.data or [], key=itemgetter("depth"))
+            return [(row["depth"], row["id"], row["name"]) for row in rows]
+        except Exception as e:
+            logger.warning(f"get_ruleset_chain RPC failed, walking chain: {e}")
+
+        # Repeat walks are served by the get_ruleset cache
         chain = []
         visited = set()
         current_id = ruleset_id
@@ -402,12 +649,47 @@ class NixoRulesetService:
             result = self.supabase.client.table("ruleset_features") \
                 .upsert(data) \
                 .execute()
+            self._invalidate_ruleset(ruleset_id)
 
             return bool(result.data)
         except Exception as e:
             logger.error(f"Failed to set ruleset feature: {e}")
             return False
 
+    def set_ruleset_features(self, ruleset_id: str, features: List[Dict]) -> bool:
+        """
+        Set several features for a ruleset in one upsert.
+
+        Args:
+            ruleset_id: The ruleset ID
+            features: List of {feature_name: str, enabled: bool, config: dict}
+        """
+        if not self.supabase:
+            return False
+        if not features:
+            return True
+
+        try:
+            data = [
+                {
+                    "ruleset_id": ruleset_id,
+                    "feature_name": f["feature_name"],
+                    "enabled": f.get("enabled", True),
+                    "config": f.get("config") or {}
+                }
+                for f in features
+            ]
+
+            result = self.supabase.client.table("ruleset_features") \
+                .upsert(data) \
+                .execute()
+            self._invalidate_ruleset(ruleset_id)
+
+            return bool(result.data)
+        except Exception as e:
+            logger.error(f"Failed to set ruleset features: {e}")
+            return False
+
     def remove_ruleset_feature(self, ruleset_id: str, feature_name: str) -> bool:
         """Remove a feature from a ruleset."""
         if not self.supabase:
@@ -419,6 +701,7 @@ class NixoRulesetService:
                 .eq("ruleset_id", ruleset_id) \
                 .eq("feature_name", feature_name) \
                 .execute()
+            self._invalidate_ruleset(ruleset_id)
             return True
         except Exception as e:
             logger.error(f"Failed to remove ruleset feature: {e}")
@@ -466,6 +749,8 @@ class NixoRulesetService:
                     .insert(data) \
                     .execute()
 
+            self._invalidate_ruleset(ruleset_id)
+
             self._log_audit("bulk_update_features", "ruleset", ruleset_id, {
                 "before": [f["feature_name"] for f in current_features],
                 "after": [f["feature_name"] for f in features]
@@ -501,6 +786,7 @@ class NixoRulesetService:
                 logger.error(f"Failed to get clients: {e2}")
                 return []
 
+    @_single_flight
     def get_client(self, client_id: str) -> Optional[Dict]:
         """Get a single client with ruleset info."""
         if not self.supabase:
@@ -543,6 +829,8 @@ class NixoRulesetService:
             result = self.supabase.client.table("client_rulesets") \
                 .upsert(data) \
                 .execute()
+            # Client counts in the ruleset list have changed
+            self._invalidate_ruleset()
 
             if result.data:
                 self._log_audit("assign_ruleset", "client", client_id, {
@@ -555,6 +843,7 @@ class NixoRulesetService:
             logger.error(f"Failed to assign ruleset: {e}")
             return False
 
+    @_single_flight
     def get_client_resolved_features(self, client_id: str) -> List[Dict]:
         """
         Get all resolved features for a client including overrides.
@@ -622,7 +911,20 @@ class NixoRulesetService:
         """
         Check if a client has a specific feature enabled.
         This is the main entry point for feature flag checks.
+
+        Uses the get_client_feature database function, which resolves just
+        this feature, and falls back to resolving all of the client's features.
         """
+        if self.supabase:
+            try:
+                result = self.supabase.client.rpc(
+                    "get_client_feature",
+                    {"p_client_id": client_id, "p_feature_name": feature_name}
+                ).execute()
+                return bool(result.data)
+            except Exception as e:
+                logger.warning(f"get_client_feature RPC failed, using fallback: {e}")
+
         features = self.get_client_resolved_features(client_id)
 
         for f in features:
@@ -635,6 +937,7 @@ class NixoRulesetService:
     # Override Operations
     # =========================================================================
 
+    @_single_flight
     def get_client_overrides(self, client_id: str) -> List[Dict]:
         """Get all overrides for a client."""
         if not self.supabase:
@@ -818,6 +1121,47 @@ class NixoRulesetService:
             logger.error(f"Failed to get audit logs: {e}")
             return []
 
+    def iter_audit_log_pages(
+        self,
+        entity_type: Optional[str] = None,
+        entity_id: Optional[str] = None,
+        limit: int = 100
+    ) -> Iterator[List[Dict]]:
+        """
+        Query audit logs page by page, newest first.
+
+        Yields lists of at most _AUDIT_PAGE_SIZE rows, fetching each page
+        only when the previous one has been consumed; stops early (after
+        logging) if a page can't be fetched.
+        """
+        if not self.supabase:
+            return
+
+        start = 0
+        while start < limit:
+            end = min(start + _AUDIT_PAGE_SIZE, limit) - 1
+            try:
+                query = self.supabase.client.table("feature_audit_log") \
+                    .select("*") \
+                    .order("created_at", desc=True) \
+                    .order("id")
+
+                if entity_type:
+                    query = query.eq("entity_type", entity_type)
+                if entity_id:
+                    query = query.eq("entity_id", entity_id)
+
+                rows = query.range(start, end).execute().data or []
+            except Exception as e:
+                logger.error(f"Failed to get audit logs: {e}")
+                return
+
+            if rows:
+                yield rows
+            if len(rows) < end - start + 1:
+                return
+            start = end + 1
+
 
 # Module-level singleton
 _service_instance: Optional[NixoRulesetService] = None
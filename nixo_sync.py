@@ -10,6 +10,8 @@ import os
 import re
 import json
 import logging
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime, timezone
 from pathlib import Path
@@ -73,6 +75,18 @@ TIER_FEATURES = {
 }
 
 
+# Feature usage patterns, compiled once. None of them can match across a
+# newline, so each can be run over a whole file instead of line by line.
+_USAGE_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r"has_feature[^\S\n]*\([^,\n]+,[^\S\n]*['\"](\w+)['\"]",
+    r"isEnabled[^\S\n]*\([^,\n]+,[^\S\n]*['\"](\w+)['\"]",
+    r"check_feature[^\S\n]*\([^,\n]+,[^\S\n]*['\"](\w+)['\"]",
+    r"@require_feature[^\S\n]*\(['\"](\w+)['\"]",
+    r"feature_flag_service\.has_feature[^\S\n]*\([^,\n]+,[^\S\n]*['\"](\w+)['\"]",
+))
+_NEWLINE = re.compile(r"\n")
+
+
 class FeatureFlagScanner:
     """Scans codebase for feature flag usage and enforcement locations."""
 
@@ -93,39 +107,58 @@ class FeatureFlagScanner:
         - @require_feature('feature_name')
         - if has_feature('feature_name'):
         """
-        usages = {}
+        content = self._read_source(file_path)
+        if content is None:
+            return {}
+        return self._scan_content(file_path, content)
 
+    @staticmethod
+    def _read_source(file_path: str) -> Optional[str]:
+        """Read a source file, or return None (with a warning) if it can't be read."""
         try:
             with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                lines = content.split('\n')
+                return f.read()
         except Exception as e:
             logger.warning(f"Could not read file {file_path}: {e}")
+            return None
+
+    def _scan_content(self, file_path: str, content: str) -> Dict[str, List[Dict]]:
+        """Find feature usages in the already-read content of file_path."""
+        usages = {}
+
+        # Every pattern contains one of these; most files can be skipped here
+        if 'feature' not in content and 'isEnabled' not in content:
             return usages
 
-        # Pattern 1: has_feature/isEnabled calls
-        patterns = [
-            r"has_feature\s*\([^,]+,\s*['\"](\w+)['\"]",
-            r"isEnabled\s*\([^,]+,\s*['\"](\w+)['\"]",
-            r"check_feature\s*\([^,]+,\s*['\"](\w+)['\"]",
-            r"@require_feature\s*\(['\"](\w+)['\"]",
-            r"feature_flag_service\.has_feature\s*\([^,]+,\s*['\"](\w+)['\"]",
-        ]
+        # Run each pattern once over the whole file, then order the hits as
+        # a line-by-line scan would: by line, then pattern, then position
+        hits = []
+        for pattern_index, pattern in enumerate(_USAGE_PATTERNS):
+            for match in pattern.finditer(content):
+                hits.append((match.start(), pattern_index, match.group(1)))
+
+        if not hits:
+            return usages
 
+        line_starts = [0]
+        line_starts.extend(match.end() for match in _NEWLINE.finditer(content))
+        lines = content.split('\n')
         rel_path = os.path.relpath(file_path, self.codebase_path)
 
-        for line_num, line in enumerate(lines, 1):
-            for pattern in patterns:
-                matches = re.findall(pattern, line)
-                for feature_name in matches:
-                    if feature_name not in usages:
-                        usages[feature_name] = []
-                    usages[feature_name].append({
-                        "file": rel_path,
-                        "line": line_num,
-                        "context": line.strip()[:100]
-                    })
-                    self.enforced_features.add(feature_name)
+        located = sorted(
+            (bisect_right(line_starts, pos), pattern_index, pos, feature_name)
+            for pos, pattern_index, feature_name in hits
+        )
+
+        for line_num, _, _, feature_name in located:
+            if feature_name not in usages:
+                usages[feature_name] = []
+            usages[feature_name].append({
+                "file": rel_path,
+                "line": line_num,
+                "context": lines[line_num - 1].strip()[:100]
+            })
+            self.enforced_features.add(feature_name)
 
         return usages
 
@@ -137,6 +170,7 @@ class FeatureFlagScanner:
             logger.warning(f"Directory not found: {directory}")
             return {}
 
+        file_paths = []
         for root, dirs, files in os.walk(directory):
             # Skip common non-source directories
             dirs[:] = [d for d in dirs if d not in {
@@ -146,13 +180,20 @@ class FeatureFlagScanner:
 
             for file in files:
                 if file.endswith('.py'):
-                    file_path = os.path.join(root, file)
-                    file_usages = self.scan_file(file_path)
+                    file_paths.append(os.path.join(root, file))
+
+        # Reads are I/O bound and release the GIL, so overlap them in a
+        # thread pool; matching stays on this thread, in walk order
+        with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) + 4)) as pool:
+            for file_path, content in zip(file_paths, pool.map(self._read_source, file_paths)):
+                if content is None:
+                    continue
+                file_usages = self._scan_content(file_path, content)
 
-                    for feature, locations in file_usages.items():
-                        if feature not in self.feature_usages:
-                            self.feature_usages[feature] = []
-                        self.feature_usages[feature].extend(locations)
+                for feature, locations in file_usages.items():
+                    if feature not in self.feature_usages:
+                        self.feature_usages[feature] = []
+                    self.feature_usages[feature].extend(locations)
 
         return self.feature_usages
 
@@ -263,23 +304,36 @@ class NixoFeatureSync:
         synced = 0
         errors = []
 
-        for feature in features:
-            try:
-                result = self.supabase.client.table("feature_registry").upsert({
-                    "name": feature["name"],
-                    "description": feature["description"],
-                    "category": feature["category"],
-                    "is_enforced": feature["is_enforced"],
-                    "enforcement_locations": feature["enforcement_locations"],
-                    "metadata": feature["metadata"],
-                    "updated_at": datetime.now(timezone.utc).isoformat()
-                }).execute()
-
-                if result.data:
-                    synced += 1
-            except Exception as e:
-                errors.append(f"{feature['name']}: {str(e)}")
-                logger.error(f"Failed to sync feature {feature['name']}: {e}")
+        updated_at = datetime.now(timezone.utc).isoformat()
+        rows = [
+            {
+                "name": feature["name"],
+                "description": feature["description"],
+                "category": feature["category"],
+                "is_enforced": feature["is_enforced"],
+                "enforcement_locations": feature["enforcement_locations"],
+                "metadata": feature["metadata"],
+                "updated_at": updated_at
+            }
+            for feature in features
+        ]
+        registry = self.supabase.client.table("feature_registry")
+
+        try:
+            # One request for the whole registry instead of one per feature
+            result = registry.upsert(rows).execute() if rows else None
+            synced = len(result.data or []) if result else 0
+        except Exception as e:
+            logger.warning(f"Bulk feature sync failed, retrying per feature: {e}")
+            # Fall back to row-by-row so the failing features can be reported
+            for row in rows:
+                try:
+                    result = registry.upsert(row).execute()
+                    if result.data:
+                        synced += 1
+                except Exception as e:
+                    errors.append(f"{row['name']}: {str(e)}")
+                    logger.error(f"Failed to sync feature {row['name']}: {e}")
 
         self._last_sync = datetime.now(timezone.utc)
 
@@ -8,7 +8,7 @@ Enhanced with targeting rules and scheduling support.
 
 import hashlib
 from datetime import datetime, timezone
-from typing import Dict, List, Any, Optional, Set, Tuple
+from typing import Callable, Dict, List, Any, Optional, Set, Tuple
 from enum import Enum
 
 
@@ -144,6 +144,10 @@ class ClientManager:
             return True
         return False
 
+    def get_client(self, client_id: str) -> Optional[Dict[str, Any]]:
+        """Get one registered client, or None if unknown."""
+        return self.clients.get(client_id)
+
     def get_all_clients(self) -> Dict[str, Dict[str, Any]]:
         """Get all registered clients."""
         return self.clients.copy()
@@ -172,6 +176,16 @@ class RulesetEngine:
         self._schedule_engine = None
         self._audit_logger = None
 
+        # Per (ruleset, feature) evaluators for the static part of
+        # is_feature_enabled, built on first use for features the ruleset
+        # has; ruleset loads swap in a new dict rather than clearing this one
+        self._compiled: Dict[Tuple[str, str], Callable[[str, Optional[Dict[str, Any]]], bool]] = {}
+
+        # Baseline features, rebuilt whenever the baseline ruleset is loaded:
+        # those has_feature() accepts, and those get_all_features() lists
+        self._baseline_enabled: frozenset = frozenset()
+        self._baseline_features: frozenset = frozenset()
+
     def set_targeting_engine(self, engine):
         """Set the targeting rules engine."""
         self._targeting_engine = engine
@@ -193,6 +207,16 @@ class RulesetEngine:
             config: Configuration dictionary for the ruleset
         """
         self.rulesets[name] = Ruleset(name, config)
+        # Any ruleset (including the baseline) may feed compiled evaluators.
+        # Swapped after the ruleset is installed: an evaluation still holding
+        # the old dict can only cache into that, never into the new one
+        self._compiled = {}
+        if name == self.baseline_ruleset_name:
+            baseline = self.rulesets[name]
+            self._baseline_enabled = frozenset(
+                f for f in baseline.features if baseline.has_feature(f)
+            )
+            self._baseline_features = frozenset(baseline.get_all_features())
 
     def load_multiple_rulesets(self, rulesets_config: Dict[str, Dict[str, Any]]) -> None:
         """
@@ -250,6 +274,9 @@ class RulesetEngine:
             if self._use_baseline:
                 return self._check_baseline_feature(feature_name)
 
+            # Taken before the ruleset is read (see load_ruleset)
+            compiled = self._compiled
+
             # Get client's assigned ruleset
             ruleset_name = self.client_manager.get_client_ruleset(client_id)
 
@@ -284,30 +311,57 @@ class RulesetEngine:
                     return False
                 # action == "variant" or None continues to normal evaluation
 
-            # Check if feature exists in ruleset
-            if not ruleset.has_feature(feature_name):
-                # Feature not in ruleset - check baseline
-                return self._check_baseline_feature(feature_name)
-
-            # Check per-feature rollout percentage
-            feature_config = ruleset.features.get(feature_name, {})
-            if isinstance(feature_config, dict):
-                percentage = feature_config.get("percentage", 100)
-
-                if percentage < 100 and user_context:
-                    # Use consistent hashing for percentage rollout
-                    if not self._passes_percentage_check(
-                        client_id, feature_name, percentage, user_context
-                    ):
-                        return self._check_baseline_feature(feature_name)
-
-            return True
+            # Ruleset membership, rollout percentage and baseline fallback
+            evaluate = compiled.get((ruleset_name, feature_name))
+            if evaluate is None:
+                if not ruleset.has_feature(feature_name):
+                    # Feature not in ruleset - baseline decides. Not cached,
+                    # so arbitrary feature names can't grow _compiled
+                    return self._check_baseline_feature(feature_name)
+                evaluate = self._compile_feature(compiled, ruleset, feature_name)
+            return evaluate(client_id, user_context)
 
         except Exception as e:
             # On any error, fall back to baseline
             print(f"Error evaluating feature '{feature_name}' for client '{client_id}': {e}")
             return self._check_baseline_feature(feature_name)
 
+    def _compile_feature(
+        self,
+        compiled: Dict[Tuple[str, str], Callable[[str, Optional[Dict[str, Any]]], bool]],
+        ruleset: Ruleset,
+        feature_name: str
+    ) -> Callable[[str, Optional[Dict[str, Any]]], bool]:
+        """
+        Build the evaluator for a feature the ruleset has and cache it in compiled.
+
+        Everything that only depends on configuration (rollout percentage,
+        baseline fallback) is resolved here once, so the returned closure
+        only does the per-user percentage check, if any.
+        """
+        feature_config = ruleset.features.get(feature_name, {})
+        percentage = 100
+        if isinstance(feature_config, dict):
+            percentage = feature_config.get("percentage", 100)
+
+        if percentage < 100:
+            baseline_enabled = self._check_baseline_feature(feature_name)
+            passes_percentage_check = self._passes_percentage_check
+
+            def evaluate(client_id, user_context):
+                # Use consistent hashing for percentage rollout
+                if user_context and not passes_percentage_check(
+                    client_id, feature_name, percentage, user_context
+                ):
+                    return baseline_enabled
+                return True
+        else:
+            def evaluate(client_id, user_context):
+                return True
+
+        compiled[(ruleset.name, feature_name)] = evaluate
+        return evaluate
+
     def is_feature_enabled_detailed(
         self,
         client_id: str,
@@ -400,11 +454,7 @@ class RulesetEngine:
 
     def _check_baseline_feature(self, feature_name: str) -> bool:
         """Check if feature exists in baseline ruleset."""
-        if self.baseline_ruleset_name not in self.rulesets:
-            return False
-
-        baseline = self.rulesets[self.baseline_ruleset_name]
-        return baseline.has_feature(feature_name)
+        return feature_name in self._baseline_enabled
 
     def _passes_percentage_check(
         self,
@@ -420,9 +470,11 @@ class RulesetEngine:
         if not user_id:
             return False
 
-        # Create deterministic hash for client + user + feature
+        # Create deterministic hash for client + user + feature; the raw
+        # digest gives the same integer as parsing hexdigest(), minus the
+        # hex string round trip
         hash_input = f"{client_id}:{user_id}:{feature_name}".encode()
-        hash_value = int(hashlib.md5(hash_input).hexdigest(), 16)
+        hash_value = int.from_bytes(hashlib.md5(hash_input).digest(), "big")
         user_percentage = (hash_value % 100) + 1
 
         return user_percentage <= percentage
@@ -449,19 +501,47 @@ class RulesetEngine:
         Returns:
             Set of feature names
         """
-        if self._use_baseline:
-            if self.baseline_ruleset_name in self.rulesets:
-                return self.rulesets[self.baseline_ruleset_name].get_all_features()
-            return set()
+        if not self._use_baseline:
+            ruleset_name = self.client_manager.get_client_ruleset(client_id)
+            if ruleset_name and ruleset_name in self.rulesets:
+                return self.rulesets[ruleset_name].get_all_features()
 
-        ruleset_name = self.client_manager.get_client_ruleset(client_id)
-        if ruleset_name and ruleset_name in self.rulesets:
-            return self.rulesets[ruleset_name].get_all_features()
+        # Kill switch or fallback to baseline
+        return set(self._baseline_features)
 
-        # Fall back to baseline
-        if self.baseline_ruleset_name in self.rulesets:
-            return self.rulesets[self.baseline_ruleset_name].get_all_features()
-        return set()
+    def get_all_client_features(self) -> Dict[str, Set[str]]:
+        """
+        Get the features available to every registered client.
+
+        Each ruleset's feature set is computed once and shared by all of its
+        clients, rather than once per client as with get_client_features.
+
+        Returns:
+            Dictionary mapping client IDs to sets of feature names
+        """
+        by_ruleset: Dict[Optional[str], frozenset] = {}
+        result = {}
+        for client_id in self.client_manager.clients:
+            ruleset_name = None
+            if not self._use_baseline:
+                ruleset_name = self.client_manager.get_client_ruleset(client_id)
+                if not ruleset_name or ruleset_name not in self.rulesets:
+                    ruleset_name = None
+
+            features = by_ruleset.get(ruleset_name)
+            if features is None:
+                # None stands for the baseline fallback
+                if ruleset_name is None:
+                    features = frozenset(self.get_client_features(client_id))
+                else:
+                    features = frozenset(self.rulesets[ruleset_name].get_all_features())
+                by_ruleset[ruleset_name] = features
+            result[client_id] = set(features)
+        return result
+
+    def get_client(self, client_id: str) -> Optional[Dict[str, Any]]:
+        """Get one registered client, or None if unknown."""
+        return self.client_manager.get_client(client_id)
 
     def get_all_clients(self) -> Dict[str, Dict[str, Any]]:
         """Get all registered clients."""
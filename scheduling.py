@@ -12,6 +12,13 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Columns read by Schedule; fetched page by page on each cache refresh
+_SCHEDULE_COLUMNS = (
+    "id,feature_name,ruleset_name,client_id,schedule_type,start_at,end_at,"
+    "timezone,cron_expression,is_active,enabled_during_schedule,priority,metadata"
+)
+_PAGE_SIZE = 1000
+
 
 class CronParser:
     """Simple cron expression parser for recurring schedules."""
@@ -213,12 +220,10 @@ class ScheduleEngine:
 
         for schedule_config in schedules_config:
             schedule = Schedule(schedule_config)
-            feature = schedule.feature_name
-
-            if feature not in self.schedules:
-                self.schedules[feature] = []
-
-            self.schedules[feature].append(schedule)
+            feature_schedules = self.schedules.get(schedule.feature_name)
+            if feature_schedules is None:
+                feature_schedules = self.schedules[schedule.feature_name] = []
+            feature_schedules.append(schedule)
 
         # Sort by priority (descending)
         for feature in self.schedules:
@@ -236,12 +241,23 @@ class ScheduleEngine:
             return
 
         try:
-            result = self.supabase.client.table("feature_schedules").select("*").eq(
-                "is_active", True
-            ).order("priority", desc=True).execute()
-
-            if result.data:
-                self.load_schedules_from_config(result.data)
+            rows = []
+            start = 0
+            while True:
+                # id breaks priority ties so pages don't overlap
+                result = self.supabase.client.table("feature_schedules").select(
+                    _SCHEDULE_COLUMNS
+                ).eq("is_active", True).order("priority", desc=True).order(
+                    "id"
+                ).range(start, start + _PAGE_SIZE - 1).execute()
+                page = result.data or []
+                rows.extend(page)
+                if len(page) < _PAGE_SIZE:
+                    break
+                start += _PAGE_SIZE
+
+            if rows:
+                self.load_schedules_from_config(rows)
 
             self._cache_loaded = True
             self._cache_time = now
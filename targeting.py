@@ -14,6 +14,14 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Columns read by TargetingRule and segment matching; fetched page by page
+_RULE_COLUMNS = (
+    "id,name,description,feature_name,ruleset_name,priority,"
+    "conditions,action,variant_value,is_active"
+)
+_SEGMENT_COLUMNS = "name,rules"
+_PAGE_SIZE = 1000
+
 
 class Operators:
     """Available targeting operators."""
@@ -56,6 +64,29 @@ def parse_semver(version: str) -> Tuple[int, int, int]:
         return (0, 0, 0)
 
 
+def prepare_conditions(conditions: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Precompute lookup data for a list of conditions.
+
+    in/not_in conditions get their lowercased values as a frozenset under
+    "_values_set", so membership checks don't rebuild a list per evaluation.
+
+    Args:
+        conditions: List of condition dicts (not modified)
+
+    Returns:
+        New list of condition dicts
+    """
+    prepared = []
+    for condition in conditions or []:
+        values = condition.get("values", [])
+        if (condition.get("operator") in (Operators.IN, Operators.NOT_IN)
+                and isinstance(values, (list, tuple, set, frozenset))):
+            condition = {**condition, "_values_set": frozenset(str(v).lower() for v in values)}
+        prepared.append(condition)
+    return prepared
+
+
 def evaluate_condition(condition: Dict[str, Any], context: Dict[str, Any]) -> bool:
     """
     Evaluate a single condition against user context.
@@ -113,12 +144,12 @@ def evaluate_condition(condition: Dict[str, Any], context: Dict[str, Any]) -> bo
             return str(actual_value).lower().endswith(str(expected_value).lower())
 
         # List operations
-        if operator == Operators.IN:
-            values_lower = [str(v).lower() for v in expected_values]
-            return str(actual_value).lower() in values_lower
-
-        if operator == Operators.NOT_IN:
-            values_lower = [str(v).lower() for v in expected_values]
+        if operator in (Operators.IN, Operators.NOT_IN):
+            values_lower = condition.get("_values_set")
+            if values_lower is None:
+                values_lower = [str(v).lower() for v in expected_values]
+            if operator == Operators.IN:
+                return str(actual_value).lower() in values_lower
             return str(actual_value).lower() not in values_lower
 
         # Numeric comparisons
@@ -225,7 +256,7 @@ class TargetingRule:
         self.feature_name = config.get("feature_name", "")
         self.ruleset_name = config.get("ruleset_name")  # None = all rulesets
         self.priority = config.get("priority", 0)
-        self.conditions = config.get("conditions", [])
+        self.conditions = prepare_conditions(config.get("conditions", []))
         self.logic = config.get("logic", "AND")  # AND/OR for conditions
         self.action = config.get("action", "enable")  # enable, disable, variant
         self.variant_value = config.get("variant_value")
@@ -265,12 +296,10 @@ class TargetingEngine:
 
         for rule_config in rules_config:
             rule = TargetingRule(rule_config)
-            feature = rule.feature_name
-
-            if feature not in self.rules:
-                self.rules[feature] = []
-
-            self.rules[feature].append(rule)
+            feature_rules = self.rules.get(rule.feature_name)
+            if feature_rules is None:
+                feature_rules = self.rules[rule.feature_name] = []
+            feature_rules.append(rule)
 
         # Sort each feature's rules by priority (descending)
         for feature in self.rules:
@@ -282,12 +311,23 @@ class TargetingEngine:
             return
 
         try:
-            result = self.supabase.client.table("targeting_rules").select("*").eq(
-                "is_active", True
-            ).order("priority", desc=True).execute()
-
-            if result.data:
-                self.load_rules_from_config(result.data)
+            rows = []
+            start = 0
+            while True:
+                # id breaks priority ties so pages don't overlap
+                result = self.supabase.client.table("targeting_rules").select(
+                    _RULE_COLUMNS
+                ).eq("is_active", True).order("priority", desc=True).order(
+                    "id"
+                ).range(start, start + _PAGE_SIZE - 1).execute()
+                page = result.data or []
+                rows.extend(page)
+                if len(page) < _PAGE_SIZE:
+                    break
+                start += _PAGE_SIZE
+
+            if rows:
+                self.load_rules_from_config(rows)
             self._cache_loaded = True
         except Exception as e:
             logger.error(f"Error loading targeting rules: {e}")
@@ -298,11 +338,14 @@ class TargetingEngine:
             return
 
         try:
-            result = self.supabase.client.table("user_segments").select("*").eq(
-                "is_active", True
-            ).execute()
-
-            self._segments = {s["name"]: s for s in (result.data or [])}
+            result = self.supabase.client.table("user_segments").select(
+                _SEGMENT_COLUMNS
+            ).eq("is_active", True).execute()
+
+            self._segments = {
+                s["name"]: {**s, "rules": prepare_conditions(s.get("rules"))}
+                for s in (result.data or [])
+            }
         except Exception as e:
             logger.error(f"Error loading segments: {e}")
 